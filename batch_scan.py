@@ -9,16 +9,71 @@ Usage:
 Example:
   python batch_scan.py 890000 890100 --skip-blocks=10
 """
+import os
 import sys
 import argparse
 import logging
-from utils import get_rpc_connection, save_last_processed_block
+from concurrent.futures import ThreadPoolExecutor
+from utils import (
+    get_rpc_connection, rpc_batch, save_last_processed_block, BoundedTxidCache,
+    load_checkpoint, save_checkpoint, clear_checkpoint, load_index_cached
+)
 from monitor_images import process_tx
 
 logger = logging.getLogger("batch_scan")
-logging.basicConfig(level=logging.INFO)
 
-def batch_scan(start_block: int, end_block: int, skip_blocks: int = 1, seen_txids: set = None) -> bool:
+# Number of block heights to resolve per JSON-RPC batch message
+BATCH_WINDOW = 64
+
+# Checkpoint file used to resume interrupted batch scans
+CHECKPOINT_FILE = ".batchscan-checkpoint.json"
+
+# Workers for per-tx extraction within a block. The extractors are
+# independent byte scans, so transactions from the same block can be
+# processed concurrently; index writes are serialized inside utils.
+EXTRACT_WORKERS = os.cpu_count() or 4
+
+def _extract_tx(tx, height, seen_txids):
+    """Run extraction for one tx, returning the number of new images"""
+    txid = tx.get('txid')
+    if txid in seen_txids:
+        return None
+    try:
+        image_count_before = count_images_in_index(txid)
+        process_tx(tx, block_height=height, is_mempool=False)
+        new_images = count_images_in_index(txid) - image_count_before
+        seen_txids.add(txid)
+        if new_images > 0 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"  Found {new_images} image(s) in tx {txid}")
+        return new_images
+    except Exception as e:
+        logger.error(f"  Error processing tx {txid}: {e}")
+        return 0
+
+def _iter_blocks(rpc_connection, heights):
+    """
+    Yield (height, block_hash, block) one block at a time.
+
+    Block hashes are resolved in batched RPC calls of BATCH_WINDOW heights,
+    but the verbosity-2 blocks themselves are fetched lazily so only one
+    decoded block is ever held in memory.
+    """
+    heights = list(heights)
+    for i in range(0, len(heights), BATCH_WINDOW):
+        window = heights[i:i + BATCH_WINDOW]
+        try:
+            hashes = rpc_batch([["getblockhash", h] for h in window])
+        except Exception as e:
+            logger.error(f"Error batch-fetching block hashes {window[0]}-{window[-1]}: {e}")
+            continue
+        for height, block_hash in zip(window, hashes):
+            try:
+                yield height, block_hash, rpc_connection.getblock(block_hash, 2)
+            except Exception as e:
+                logger.error(f"Error fetching block {height}: {e}")
+
+def batch_scan(start_block: int, end_block: int, skip_blocks: int = 1, seen_txids: BoundedTxidCache = None,
+               resume: bool = False) -> bool:
     """
     Scan a range of blocks for images.
     
@@ -27,9 +82,10 @@ def batch_scan(start_block: int, end_block: int, skip_blocks: int = 1, seen_txid
         end_block: Ending block height (inclusive)
         skip_blocks: Number of blocks to skip between each scan (default: 1)
         seen_txids: Set of already seen transaction IDs
+        resume: Resume from an interrupted scan's checkpoint if one matches
     """
     if seen_txids is None:
-        seen_txids = set()
+        seen_txids = BoundedTxidCache()
         
     rpc_connection = get_rpc_connection()
     
@@ -59,53 +115,66 @@ def batch_scan(start_block: int, end_block: int, skip_blocks: int = 1, seen_txid
     processed_txs = 0
     found_images = 0  # Track images found
     
+    all_heights = range(start_block, end_block + 1, skip_blocks)
+
+    # Resume from a checkpoint if one exists for the same block range
+    if resume:
+        checkpoint = load_checkpoint(CHECKPOINT_FILE)
+        if (checkpoint and checkpoint.get("start_block") == start_block
+                and checkpoint.get("end_block") == end_block
+                and checkpoint.get("skip_blocks") == skip_blocks):
+            last_height = checkpoint.get("last_height")
+            found_images = checkpoint.get("found_images", 0)
+            all_heights = [h for h in all_heights if h > last_height]
+            logger.info(f"Resuming scan after block {last_height} "
+                        f"({len(all_heights)} blocks remaining)")
+        elif checkpoint:
+            logger.info("Checkpoint doesn't match this block range, starting fresh")
+
+    extract_pool = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS)
     try:
-        # Process blocks in the range
-        for height in range(start_block, end_block + 1, skip_blocks):
+        # Stream blocks one at a time: only the cheap block-hash lookups are
+        # batched per window, while the multi-MB verbosity-2 blocks are
+        # fetched and processed one by one so peak memory stays flat at a
+        # single block instead of a whole window of them
+        for height, block_hash, block in _iter_blocks(rpc_connection, all_heights):
             try:
-                block_hash = rpc_connection.getblockhash(height)
-                block = rpc_connection.getblock(block_hash)
                 block_txs = len(block['tx'])
-                
-                # Update progress
+
+                # Update progress (log every 100 blocks so the f-string
+                # construction and handler lock stay off the hot path)
                 processed_blocks += 1
-                progress = (processed_blocks / blocks_to_scan) * 100
-                logger.info(f"Block {height} ({progress:.1f}%) - Processing {block_txs} transactions")
-                
-                # Process each transaction
+                if processed_blocks % 100 == 0 and logger.isEnabledFor(logging.INFO):
+                    progress = (processed_blocks / blocks_to_scan) * 100
+                    logger.info(f"Block {height} ({progress:.1f}%) - Processing {block_txs} transactions")
+
+                # Process the block's transactions concurrently; each tx
+                # is independent and the index serializes its own writes
                 block_images = 0
-                for txid in block['tx']:
-                    if txid not in seen_txids:
-                        try:
-                            tx = rpc_connection.getrawtransaction(txid, 2, block_hash)
-                            
-                            # Track images before processing
-                            image_count_before = count_images_in_index(txid)
-                            
-                            # Process the transaction
-                            process_tx(tx, block_height=height, is_mempool=False)
-                            
-                            # Check if images were found
-                            image_count_after = count_images_in_index(txid)
-                            new_images = image_count_after - image_count_before
-                            if new_images > 0:
-                                block_images += new_images
-                                found_images += new_images
-                                logger.info(f"  Found {new_images} image(s) in tx {txid}")
-                            
-                            seen_txids.add(txid)
-                            processed_txs += 1
-                            
-                        except Exception as e:
-                            logger.error(f"  Error processing tx {txid}: {e}")
-                
+                for new_images in extract_pool.map(
+                        lambda tx: _extract_tx(tx, height, seen_txids), block['tx']):
+                    if new_images is None:
+                        continue
+                    if new_images > 0:
+                        block_images += new_images
+                        found_images += new_images
+                    processed_txs += 1
+
                 if block_images > 0:
                     logger.info(f"  Block {height} total: {block_images} images")
-                
-                # Update checkpoint every 10 blocks
+
+                # Checkpoint after every block so an interrupted scan
+                # can resume without reprocessing completed blocks
+                save_checkpoint(CHECKPOINT_FILE, {
+                    "start_block": start_block,
+                    "end_block": end_block,
+                    "skip_blocks": skip_blocks,
+                    "last_height": height,
+                    "found_images": found_images
+                })
                 if processed_blocks % 10 == 0:
                     save_last_processed_block(height)
-                
+
             except Exception as e:
                 logger.error(f"Error processing block {height}: {e}")
         
@@ -114,6 +183,9 @@ def batch_scan(start_block: int, end_block: int, skip_blocks: int = 1, seen_txid
         logger.info(f"Processed {processed_blocks} blocks with {processed_txs} transactions")
         logger.info(f"Found {found_images} images\n")
         
+        # Clean exit - the checkpoint is no longer needed
+        clear_checkpoint(CHECKPOINT_FILE)
+        
         return True
         
     except KeyboardInterrupt:
@@ -121,25 +193,12 @@ def batch_scan(start_block: int, end_block: int, skip_blocks: int = 1, seen_txid
         logger.info(f"Progress: {processed_blocks}/{blocks_to_scan} blocks scanned")
         logger.info(f"Found {found_images} images so far\n")
         return False
+    finally:
+        extract_pool.shutdown(wait=False, cancel_futures=True)
 
 def count_images_in_index(txid):
     """Count how many images are in the index for a given transaction"""
-    import json
-    import os
-    
-    index_file = "images/index.json"
-    if not os.path.isfile(index_file):
-        return 0
-        
-    try:
-        with open(index_file, "r") as jf:
-            index = json.load(jf)
-        if txid in index:
-            return len(index[txid])
-    except:
-        pass
-        
-    return 0
+    return len(load_index_cached().get(txid, []))
 
 def main():
     parser = argparse.ArgumentParser(
@@ -149,10 +208,14 @@ def main():
     parser.add_argument('end_block', type=int, help='Ending block height (inclusive)')
     parser.add_argument('--skip-blocks', type=int, default=1, 
                         help='Number of blocks to skip between scans (default: 1)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume an interrupted scan from its checkpoint')
     
     args = parser.parse_args()
     
-    return 0 if batch_scan(args.start_block, args.end_block, args.skip_blocks) else 1
+    return 0 if batch_scan(args.start_block, args.end_block, args.skip_blocks,
+                           resume=args.resume) else 1
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     sys.exit(main())
@@ -1,19 +1,18 @@
-import time
 import logging
 from utils import (
     get_rpc_connection, get_last_processed_block, save_last_processed_block,
-    process_tx
+    process_tx, promote_tx_to_block, backoff_delay, shutdown_event,
+    TX_STATUS_MEMPOOL, TX_STATUS_CONFIRMED
 )
 
 logger = logging.getLogger("block_scanner")
-logging.basicConfig(level=logging.INFO)
 
-rpc_connection = get_rpc_connection()
-
-def scan_blocks(seen_txids: set, start_height: int = None) -> None:
+def scan_blocks(seen_txids, start_height: int = None) -> None:
     logger.info("[BlockScanner] Monitoring new blocks for transactions...")
+    rpc_connection = get_rpc_connection()
     last_block_hash = None
     current_height = None
+    error_attempts = 0
     DEFAULT_START_BLOCK = 896070  # Set default starting block
     
     # Try to load last processed block height from state file
@@ -50,10 +49,15 @@ def scan_blocks(seen_txids: set, start_height: int = None) -> None:
             logger.error(f"[BlockScanner] Invalid start_height {start_height}: {e}")
             current_height = None
             
+    next_block_hash = None
     while True:
         try:
             # Handle fixed height scanning vs tip scanning
-            if current_height is not None:
+            if next_block_hash is not None:
+                # The previous block already told us its successor's hash,
+                # so skip the getblockhash round-trip entirely
+                block_hash = next_block_hash
+            elif current_height is not None:
                 try:
                     block_hash = rpc_connection.getblockhash(current_height)
                 except Exception as e:
@@ -67,28 +71,44 @@ def scan_blocks(seen_txids: set, start_height: int = None) -> None:
                 block_hash = rpc_connection.getbestblockhash()
             
             if block_hash != last_block_hash:
-                block = rpc_connection.getblock(block_hash)
+                # Verbosity 2 returns every transaction fully decoded inline,
+                # collapsing 1 + |txs| RPC round-trips per block into one
+                block = rpc_connection.getblock(block_hash, 2)
                 logger.info(f"[BlockScanner] New block: {block['height']} ({block_hash}) with {len(block['tx'])} txs")
                 
-                for txid in block['tx']:
-                    if txid not in seen_txids:
+                for tx in block['tx']:
+                    txid = tx.get('txid')
+                    status = seen_txids.get(txid)
+                    if status == TX_STATUS_CONFIRMED:
+                        continue
+                    if status == TX_STATUS_MEMPOOL:
+                        # Already extracted when it passed through the
+                        # mempool - don't reprocess, just backfill the
+                        # block info onto its index entries
                         try:
-                            # Get full transaction details
-                            tx = rpc_connection.getrawtransaction(txid, 2, block_hash)
-                            
-                            # Use the enhanced process_tx function that checks all extraction methods
-                            process_tx(tx, block_height=block['height'], is_mempool=False)
-                            
-                            # Mark as seen
-                            seen_txids.add(txid)
+                            promote_tx_to_block(txid, block['height'])
                         except Exception as e:
-                            logger.error(f"[BlockScanner] Error processing tx {txid}: {e}")
-                            continue
+                            logger.error(f"[BlockScanner] Error promoting tx {txid}: {e}")
+                        seen_txids.add(txid, TX_STATUS_CONFIRMED)
+                        continue
+                    try:
+                        # Use the enhanced process_tx function that checks all extraction methods
+                        process_tx(tx, block_height=block['height'], is_mempool=False)
+
+                        # Mark as seen
+                        seen_txids.add(txid, TX_STATUS_CONFIRMED)
+                    except Exception as e:
+                        logger.error(f"[BlockScanner] Error processing tx {txid}: {e}")
+                        continue
                 
                 # Save the current block height to state file
                 save_last_processed_block(block['height'])
                 last_block_hash = block_hash
-                
+
+                # At the tip there is no successor yet; fall back to
+                # polling getblockhash/getbestblockhash until one appears
+                next_block_hash = block.get('nextblockhash')
+
                 if current_height is not None:
                     current_height += 1
                 else:
@@ -96,7 +116,14 @@ def scan_blocks(seen_txids: set, start_height: int = None) -> None:
                     # so we resume from the next block on restart
                     current_height = block['height'] + 1
                     
-            time.sleep(2)
+            error_attempts = 0
+            if shutdown_event.wait(2):
+                return
         except Exception as e:
             logger.error(f"[BlockScanner] Error: {e}")
-            time.sleep(5)
\ No newline at end of file
+            # Re-derive the next hash from the height after an error in
+            # case the cached successor was from a reorged-away block
+            next_block_hash = None
+            if shutdown_event.wait(backoff_delay(error_attempts)):
+                return
+            error_attempts += 1
\ No newline at end of file
@@ -8,15 +8,12 @@ Options:
   --scan   Force scan the transaction even if it's already indexed
 """
 import sys
-import os
 import argparse
-from monitor_images import lookup_image, process_tx
-from utils import get_rpc_connection, display_image
-import json
+from monitor_images import lookup_image, display_lookup_results, process_tx
+from utils import get_rpc_connection, decode_raw_transaction
 import logging
 
 logger = logging.getLogger("lookup_image")
-logging.basicConfig(level=logging.INFO)
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Look up images in a Bitcoin transaction")
@@ -38,9 +35,8 @@ def main() -> int:
         logger.info(f"Transaction {txid} not found in local index. Attempting to fetch from blockchain...")
         try:
             rpc_connection = get_rpc_connection()
-            tx = rpc_connection.getrawtransaction(txid, 2)
-            from monitor_images import process_tx
-            
+            tx = decode_raw_transaction(rpc_connection.getrawtransaction(txid, 0))
+
             logger.info(f"Processing transaction {txid}...")
             process_tx(tx)
             
@@ -53,23 +49,12 @@ def main() -> int:
             logger.error(f"Error fetching transaction {txid}: {e}")
             return 1
     
-    # If we found images, display them again
+    # If we found images, show the metadata and offer to render them
     if entries:
-        for entry in entries:
-            filename = entry.get('filename')
-            if filename and os.path.exists(filename):
-                img_type = entry.get('image_type', 'png')
-                with open(filename, 'rb') as f:
-                    img_data = f.read()
-                
-                print(f"\nDisplaying image: {filename}")
-                print("Image metadata:")
-                print(json.dumps(entry, indent=2))
-                
-                # Use the display function to show the image in terminal
-                display_image(img_data, img_type, txid)
-    
+        display_lookup_results(entries)
+
     return 0
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     sys.exit(main())
@@ -1,28 +1,78 @@
-import time
+import os
 import logging
-from utils import get_rpc_connection, process_tx
+from utils import (
+    get_rpc_connection, process_tx, decode_raw_transaction, backoff_delay,
+    shutdown_event, TX_STATUS_MEMPOOL
+)
+
+# ZMQ lets us receive each transaction exactly once as it arrives instead
+# of re-listing the whole mempool every poll (requires bitcoind started
+# with -zmqpubrawtx and BITCOIN_ZMQ_RAWTX set in .env)
+try:
+    import zmq
+    ZMQ_AVAILABLE = True
+except ImportError:
+    ZMQ_AVAILABLE = False
 
 logger = logging.getLogger("mempool_scanner")
-logging.basicConfig(level=logging.INFO)
 
-rpc_connection = get_rpc_connection()
+def _scan_mempool_zmq(seen_txids, endpoint: str) -> None:
+    """Process transactions pushed by bitcoind's rawtx ZMQ publisher"""
+    logger.info(f"[MempoolScanner] Subscribing to ZMQ rawtx at {endpoint}")
+    context = zmq.Context()
+    socket = context.socket(zmq.SUB)
+    socket.connect(endpoint)
+    socket.setsockopt(zmq.SUBSCRIBE, b"rawtx")
+    while True:
+        try:
+            parts = socket.recv_multipart()
+            raw_tx = parts[1]
+            tx = decode_raw_transaction(raw_tx.hex())
+            txid = tx['txid']
+            if txid not in seen_txids:
+                process_tx(tx, block_height=None, is_mempool=True)
+                seen_txids.add(txid, TX_STATUS_MEMPOOL)
+        except Exception as e:
+            logger.error(f"[MempoolScanner] ZMQ error: {e}")
+            if shutdown_event.wait(5):
+                return
+
+def scan_mempool(seen_txids) -> None:
+    # Prefer ZMQ push notifications when available and configured
+    zmq_endpoint = os.getenv("BITCOIN_ZMQ_RAWTX")
+    if ZMQ_AVAILABLE and zmq_endpoint:
+        _scan_mempool_zmq(seen_txids, zmq_endpoint)
+        return
 
-def scan_mempool(seen_txids: set) -> None:
     logger.info("[MempoolScanner] Monitoring mempool for new transactions...")
+    rpc_connection = get_rpc_connection()
+    # Keep the previous mempool snapshot so each poll only processes the
+    # delta (new arrivals) instead of iterating the entire mempool
+    previous_snapshot = frozenset()
+    error_attempts = 0
     while True:
         try:
             mempool_txids = rpc_connection.getrawmempool()
-            for txid in mempool_txids:
+            current_snapshot = frozenset(mempool_txids)
+            for txid in current_snapshot - previous_snapshot:
                 if txid not in seen_txids:
                     try:
-                        tx = rpc_connection.getrawtransaction(txid, 2)
+                        # Fetch raw hex (verbosity 0) and decode locally - much
+                        # cheaper than having bitcoind JSON-encode the whole tx
+                        raw_hex = rpc_connection.getrawtransaction(txid, 0)
+                        tx = decode_raw_transaction(raw_hex)
                         # Use the enhanced process_tx function that checks all extraction methods
                         process_tx(tx, block_height=None, is_mempool=True)
-                        seen_txids.add(txid)
+                        seen_txids.add(txid, TX_STATUS_MEMPOOL)
                     except Exception as e:
                         logger.error(f"[MempoolScanner] Error processing tx {txid}: {e}")
                         continue
-            time.sleep(2)
+            previous_snapshot = current_snapshot
+            error_attempts = 0
+            if shutdown_event.wait(2):
+                return
         except Exception as e:
             logger.error(f"[MempoolScanner] Error: {e}")
-            time.sleep(5)
\ No newline at end of file
+            if shutdown_event.wait(backoff_delay(error_attempts)):
+                return
+            error_attempts += 1
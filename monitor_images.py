@@ -1,88 +1,78 @@
 import os
-import time
-import csv
-import json
-from datetime import datetime
-from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException
+import sys
 from dotenv import load_dotenv
-import base64
-import tempfile
 import subprocess
 import threading
 from mempool_scanner import scan_mempool
 from block_scanner import scan_blocks
 from utils import (
-    extract_images_from_witness, 
-    extract_images_from_op_return,
-    extract_images_from_corrupted_outputs, 
-    extract_ipfs_references,
-    display_image,
-    process_tx
+    shutdown_event,
+    process_tx,
+    BoundedTxidCache,
+    load_index_cached
 )
 import logging
 
 # Load environment variables from .env
 load_dotenv()
 
-# RPC connection details from .env
-rpc_user = os.getenv("BITCOIN_RPC_USER")
-rpc_password = os.getenv("BITCOIN_RPC_PASSWORD")
-rpc_host = os.getenv("BITCOIN_RPC_HOST")
-rpc_port = os.getenv("BITCOIN_RPC_PORT")
-rpc_connection = AuthServiceProxy(f"http://{rpc_user}:{rpc_password}@{rpc_host}:{rpc_port}")
-
 logger = logging.getLogger("monitor_images")
-logging.basicConfig(level=logging.INFO)
 
 def lookup_image(txid: str) -> list | None:
     """
     Look up images for a specific transaction ID in the local index.
-    Returns the index entries if found, None otherwise.
+    Returns the index entries if found, None otherwise. Pure data lookup -
+    use display_lookup_results for the interactive part.
     """
-    index_file = "images/index.json"
-    if not os.path.isfile(index_file):
+    index = load_index_cached()
+    if not index:
         logger.error("No index file found.")
         return None
-    
-    try:
-        with open(index_file, "r") as jf:
-            index = json.load(jf)
-            if txid in index:
-                entries = index[txid]
-                logger.info(f"Found {len(entries)} image(s) for txid {txid}:")
-                for i, entry in enumerate(entries):
-                    logger.info(f"\nImage {i+1}/{len(entries)}:")
-                    
-                    # Display key metadata
-                    logger.info(f"  Type: {entry.get('extraction_method', 'unknown')}")
-                    logger.info(f"  Format: {entry.get('image_type', 'unknown')}")
-                    
-                    # Display file information if available
-                    if "filename" in entry:
-                        filename = entry["filename"]
-                        logger.info(f"  Filename: {filename}")
-                        
-                        # Check if the file exists
-                        if os.path.exists(filename):
-                            file_size = os.path.getsize(filename)
-                            logger.info(f"  File size: {file_size} bytes")
-                            
-                            # If requested, display the image
-                            should_display = input("Display this image? [y/N]: ").lower() == 'y'
-                            if should_display:
-                                subprocess.run(["viu", filename])
-                        else:
-                            logger.warning(f"  [WARNING] File doesn't exist: {filename}")
-                return entries
-        
-        logger.info("No images found for txid:", txid)
-    except Exception as e:
-        logger.error(f"Error reading index: {e}")
-    
+
+    entries = index.get(txid)
+    if entries:
+        logger.info(f"Found {len(entries)} image(s) for txid {txid}")
+        return entries
+
+    logger.info(f"No images found for txid: {txid}")
     return None
 
+def display_lookup_results(entries: list) -> None:
+    """
+    Show lookup results and optionally render them with viu. Only prompts
+    when attached to a terminal, so non-interactive callers never block
+    on stdin.
+    """
+    interactive = sys.stdin.isatty()
+    for i, entry in enumerate(entries):
+        logger.info(f"\nImage {i+1}/{len(entries)}:")
+
+        # Display key metadata
+        logger.info(f"  Type: {entry.get('extraction_method', 'unknown')}")
+        logger.info(f"  Format: {entry.get('image_type', 'unknown')}")
+
+        # Display file information if available
+        filename = entry.get("filename")
+        if filename:
+            logger.info(f"  Filename: {filename}")
+
+            # One stat call covers both the existence check and the size
+            try:
+                file_size = os.stat(filename).st_size
+            except FileNotFoundError:
+                logger.warning(f"  [WARNING] File doesn't exist: {filename}")
+                continue
+            logger.info(f"  File size: {file_size} bytes")
+
+            # If requested, display the image
+            if interactive:
+                should_display = input("Display this image? [y/N]: ").lower() == 'y'
+                if should_display:
+                    subprocess.run(["viu", filename])
+
 if __name__ == "__main__":
-    seen_txids = set()
+    logging.basicConfig(level=logging.INFO)
+    seen_txids = BoundedTxidCache()
     
     # If we pass None to scan_blocks:
     # 1. It will first try to use the last processed block from state.json
@@ -96,8 +86,8 @@ if __name__ == "__main__":
     t2.start()
     logger.info("[Main] Real-time blockchain image monitor started. Press Ctrl+C to exit.")
     try:
-        while True:
-            t1.join(1)
-            t2.join(1)
+        # Block until shutdown instead of spinning on join(1) wake-ups
+        shutdown_event.wait()
     except KeyboardInterrupt:
+        shutdown_event.set()
         logger.info("[Main] Exiting monitor.")
\ No newline at end of file
@@ -12,36 +12,59 @@ Options:
   --limit=N            Limit results to N entries (default: 10)
 """
 import os
-import json
 import sys
+import bisect
 import argparse
 import logging
-from utils import display_image
+from collections import defaultdict
+from utils import display_image, load_index_cached
 
 logger = logging.getLogger("search_images")
-logging.basicConfig(level=logging.INFO)
 
 def load_index() -> dict | None:
-    """Load the image index file"""
-    index_file = "images/index.json"
-    if not os.path.isfile(index_file):
+    """Load the image index file (cached in utils, orjson-backed)"""
+    index = load_index_cached()
+    if not index:
         logger.error("No index file found.")
         return None
+    return index
+
+def build_search_indexes(index: dict) -> tuple:
+    """
+    Build secondary lookup structures over the index so searches don't
+    have to re-check every entry against every criterion:
+    - entries: flat list of all entries (with txid attached)
+    - by_type / by_method: dicts mapping attribute value -> entry positions
+    - by_block: sorted (block_height, position) list for range queries
+    """
+    entries = []
+    by_type = defaultdict(set)
+    by_method = defaultdict(set)
+    by_block = []
     
-    try:
-        with open(index_file, "r") as jf:
-            return json.load(jf)
-    except Exception as e:
-        logger.error(f"Error loading index: {e}")
-        return None
+    for txid, txid_entries in index.items():
+        for entry in txid_entries:
+            pos = len(entries)
+            result = entry.copy()
+            result["txid"] = txid
+            entries.append(result)
+            
+            by_type[entry.get("image_type", "unknown")].add(pos)
+            entry_method = entry.get("extraction_method", entry.get("inscription_type", "unknown"))
+            by_method[entry_method].add(pos)
+            
+            block_height = entry.get("block_height")
+            if block_height is not None:
+                by_block.append((block_height, pos))
+    
+    by_block.sort()
+    return entries, by_type, by_method, by_block
 
 def search_images(index: dict, criteria: dict) -> list:
     """Search for images matching the given criteria"""
     if not index:
         return []
     
-    results = []
-    
     # Extract search criteria
     img_type = criteria.get("type")
     method = criteria.get("method")
@@ -49,44 +72,31 @@ def search_images(index: dict, criteria: dict) -> list:
     block_max = criteria.get("block_max")
     limit = criteria.get("limit", 10)
     
-    for txid, entries in index.items():
-        for entry in entries:
-            # Check if entry matches all criteria
-            match = True
-            
-            # Image type filter
-            if img_type and entry.get("image_type") != img_type:
-                match = False
-            
-            # Method filter
-            if method:
-                entry_method = entry.get("extraction_method", entry.get("inscription_type", "unknown"))
-                if entry_method != method:
-                    match = False
-            
-            # Block range filter
-            if block_min is not None or block_max is not None:
-                block_height = entry.get("block_height")
-                if block_height is None:
-                    match = False
-                else:
-                    if block_min is not None and block_height < block_min:
-                        match = False
-                    if block_max is not None and block_height > block_max:
-                        match = False
-            
-            # If all criteria match, add to results
-            if match:
-                # Add txid to the entry for reference
-                result = entry.copy()
-                result["txid"] = txid
-                results.append(result)
-                
-                # Check if we've reached the limit
-                if len(results) >= limit:
-                    break
-    
-    return results
+    entries, by_type, by_method, by_block = build_search_indexes(index)
+    
+    # Intersect the candidate sets for each active filter instead of
+    # scanning every entry against every criterion
+    candidates = None
+    
+    if img_type:
+        candidates = set(by_type.get(img_type, ()))
+    
+    if method:
+        method_matches = by_method.get(method, set())
+        candidates = set(method_matches) if candidates is None else candidates & method_matches
+    
+    if block_min is not None or block_max is not None:
+        # Binary-search the sorted (height, position) list for the range
+        lo = bisect.bisect_left(by_block, (block_min, -1)) if block_min is not None else 0
+        hi = bisect.bisect_right(by_block, (block_max, len(entries))) if block_max is not None else len(by_block)
+        block_matches = {pos for _, pos in by_block[lo:hi]}
+        candidates = block_matches if candidates is None else candidates & block_matches
+    
+    if candidates is None:
+        # No filters - everything matches
+        candidates = range(len(entries))
+    
+    return [entries[pos] for pos in sorted(candidates)[:limit]]
 
 def main():
     parser = argparse.ArgumentParser(description="Search for images in the Bitcoin blockchain")
@@ -166,4 +176,5 @@ def main():
     return 0
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     sys.exit(main())
@@ -10,36 +10,187 @@ Options:
 import os
 import sys
 import json
+import pickle
 import argparse
 import logging
 from datetime import datetime
 from collections import Counter, defaultdict
 
+# ijson parses the index incrementally so the full dict never has to be
+# materialized; fall back to json.load when it isn't installed
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# orjson parses and serializes large JSON documents several times faster
+# than the stdlib; fall back when it isn't installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from utils import load_index_cached, _apply_index_entry, INDEX_FILE, INDEX_JSONL
+
 logger = logging.getLogger("stats")
-logging.basicConfig(level=logging.INFO)
+
+# Bump when the cached pickle layout changes so stale caches self-invalidate
+_CACHE_VERSION = 2
 
 def load_index() -> dict | None:
-    """Load the image index file"""
-    index_file = "images/index.json"
-    if not os.path.isfile(index_file):
+    """
+    Load the merged image index: the compacted index.json plus the
+    append-only index.jsonl tail, via utils' shared loader. The parsed
+    dict is memoized in a pickle sidecar keyed on both files' (mtime,
+    size), so repeated runs skip the parse while the index is unchanged.
+    """
+    stamp = []
+    for path in (INDEX_FILE, INDEX_JSONL):
+        try:
+            st = os.stat(path)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append(None)
+    stamp = tuple(stamp)
+    if stamp == (None, None):
         logger.error("No index file found.")
         return None
-    
+
+    cache_file = INDEX_FILE + ".cache.pkl"
+    try:
+        with open(cache_file, "rb") as cf:
+            cached = pickle.load(cf)
+        if (cached.get("__cache_version__") == _CACHE_VERSION
+                and cached.get("stamp") == stamp):
+            return cached["index"]
+    except (OSError, pickle.PickleError, EOFError, AttributeError):
+        pass
+
+    index = load_index_cached()
+    if not index:
+        logger.error("No index file found.")
+        return None
+
+    # Refresh the cache atomically so a concurrent reader never sees a
+    # half-written pickle
+    try:
+        tmp_path = cache_file + ".tmp"
+        with open(tmp_path, "wb") as cf:
+            pickle.dump({"__cache_version__": _CACHE_VERSION,
+                         "stamp": stamp,
+                         "index": index}, cf, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not write index cache: {e}")
+
+    return index
+
+def iter_index(index_file: str = INDEX_FILE):
+    """
+    Yield (txid, entries) pairs from the merged index without holding the
+    whole parsed dict in memory. index.json is streamed with ijson's
+    incremental parser when available; the index.jsonl tail (entries not
+    yet materialized) is small, so it is read up-front and its records
+    merged into each txid's entries as the stream passes them.
+    """
+    if not (os.path.isfile(index_file) or os.path.isfile(INDEX_JSONL)):
+        logger.error("No index file found.")
+        return
+    if not IJSON_AVAILABLE:
+        yield from load_index_cached(index_file).items()
+        return
+
+    # Unmaterialized tail, grouped per txid for the merge below
+    pending: dict[str, list] = {}
     try:
-        with open(index_file, "r") as jf:
-            return json.load(jf)
+        if os.path.isfile(INDEX_JSONL):
+            with open(INDEX_JSONL, "rb") as jf:
+                for line in jf:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
+                        txid = record.pop("txid", None)
+                        if txid:
+                            pending.setdefault(txid, []).append(record)
+                    except Exception:
+                        logger.warning(f"Skipping corrupt index line: {line[:60]}...")
+    except Exception as e:
+        logger.error(f"Error loading index log: {e}")
+
+    try:
+        if os.path.isfile(index_file):
+            with open(index_file, "rb") as jf:
+                for txid, entries in ijson.kvitems(jf, ''):
+                    # Same dedup/promote rules the writer uses
+                    for record in pending.pop(txid, ()):
+                        _apply_index_entry({txid: entries}, txid, record)
+                    yield txid, entries
     except Exception as e:
         logger.error(f"Error loading index: {e}")
+
+    # txids that only ever hit the log since the last compaction
+    for txid, records in pending.items():
+        merged: dict[str, list] = {}
+        for record in records:
+            _apply_index_entry(merged, txid, record)
+        yield txid, merged[txid]
+
+def _prefetch_sizes(root: str = "images") -> dict[str, int]:
+    """
+    Collect {path: size} for every file under root in one scandir walk.
+    A single batched directory scan replaces the two syscalls per entry
+    (exists + getsize) the stats loop used to make.
+    """
+    sizes = {}
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        sizes[os.path.normpath(entry.path)] = entry.stat(follow_symlinks=False).st_size
+        except OSError as e:
+            logger.warning(f"Could not scan {current}: {e}")
+    return sizes
+
+def _parse_iso(raw) -> datetime | None:
+    """
+    Parse an ISO-8601 timestamp, returning None for malformed values
+    (including non-string ones). Cheap structural checks reject bad
+    values before fromisoformat so the loop never pays exception setup
+    for predictably bad data.
+    """
+    if not isinstance(raw, str) or len(raw) < 10 or raw[4] != '-' or raw[7] != '-':
+        return None
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
         return None
 
-def generate_statistics(index: dict) -> dict | None:
-    """Generate statistics from the image index"""
-    if not index:
+# Fields that trigger extra per-entry work beyond the counters
+_OPTIONAL_FIELDS = frozenset({"block_height", "timestamp", "filename"})
+
+def generate_statistics(index) -> dict | None:
+    """
+    Generate statistics from the image index. Accepts either the index
+    dict or any iterable of (txid, entries) pairs, so callers can stream
+    the index instead of loading it whole.
+    """
+    if index is None:
         return None
-    
+    if isinstance(index, dict):
+        index = index.items()
+
     stats = {
         "total_images": 0,
-        "total_txs": len(index),
+        "total_txs": 0,
         "by_source": Counter(),
         "by_type": Counter(),
         "by_extraction_method": Counter(),
@@ -58,61 +209,101 @@ def generate_statistics(index: dict) -> dict | None:
     
     # Process all entries
     image_count = 0
-    total_size = 0
-    min_size = float('inf')
-    max_size = 0
-    
+    matched_sizes = []
+
     earliest_timestamp = None
     latest_timestamp = None
-    
-    for txid, entries in index.items():
+
+    # One batched directory walk up-front instead of two stat syscalls
+    # per index entry inside the loop
+    sizes = _prefetch_sizes()
+
+    # Collect attribute columns into flat lists and count them after the
+    # loop: Counter(list) runs its counting loop in C, replacing per-entry
+    # Python-level increments
+    sources = []
+    methods = []
+    img_types = []
+    months = []
+    blocks = stats["blocks"]
+
+    # Entries from the same block share a timestamp, so memoize parses by
+    # the raw string; the month key is a pure slice of the ISO string
+    ts_cache: dict[str, tuple[datetime, str]] = {}
+
+    _unknown = "unknown"
+
+    total_txs = 0
+    for txid, entries in index:
+        total_txs += 1
         for entry in entries:
             image_count += 1
             
             # Source (mempool or block)
-            source = entry.get("source", "unknown")
-            stats["by_source"][source] += 1
-            
-            # Extraction method
-            method = entry.get("extraction_method", entry.get("inscription_type", "unknown"))
-            stats["by_extraction_method"][method] += 1
-            
+            sources.append(entry.get("source", _unknown))
+
+            # Extraction method (or-chain probes each key at most once)
+            methods.append(entry.get("extraction_method")
+                           or entry.get("inscription_type") or _unknown)
+
             # Image type
-            img_type = entry.get("image_type", "unknown")
-            stats["by_image_type"][img_type] += 1
-            
+            img_types.append(entry.get("image_type", _unknown))
+
+            # Entries carrying none of the optional fields are done after
+            # the counters - skip the remaining probes in one C check
+            if _OPTIONAL_FIELDS.isdisjoint(entry.keys()):
+                continue
+
             # Block height (if available)
-            if "block_height" in entry:
-                stats["blocks"].add(entry["block_height"])
+            block_height = entry.get("block_height")
+            if block_height is not None:
+                blocks.add(block_height)
             
             # Timestamp
-            if "timestamp" in entry:
-                try:
-                    ts = datetime.fromisoformat(entry["timestamp"])
-                    month_key = ts.strftime("%Y-%m")
-                    stats["by_month"][month_key] += 1
-                    
+            raw_ts = entry.get("timestamp")
+            if raw_ts is not None:
+                cached = ts_cache.get(raw_ts)
+                if cached is None:
+                    ts = _parse_iso(raw_ts)
+                    # ISO strings start with YYYY-MM, so the month key
+                    # is a slice - no strftime needed
+                    cached = (ts, raw_ts[:7] if ts is not None else None)
+                    ts_cache[raw_ts] = cached
+                ts, month_key = cached
+                if ts is not None:
+                    months.append(month_key)
+
                     # Track earliest and latest
                     if earliest_timestamp is None or ts < earliest_timestamp:
                         earliest_timestamp = ts
                     if latest_timestamp is None or ts > latest_timestamp:
                         latest_timestamp = ts
-                except:
-                    pass
             
-            # File size
-            if "filename" in entry and os.path.exists(entry["filename"]):
-                file_size = os.path.getsize(entry["filename"])
-                total_size += file_size
-                min_size = min(min_size, file_size)
-                max_size = max(max_size, file_size)
+            # File size (from the prefetched scandir pass); the reduction
+            # happens in one C-level pass after the loop
+            filename = entry.get("filename")
+            if filename is not None:
+                file_size = sizes.get(os.path.normpath(filename))
+                if file_size is not None:
+                    matched_sizes.append(file_size)
     
     # Update statistics
     stats["total_images"] = image_count
+    stats["total_txs"] = total_txs
+    if total_txs == 0:
+        return None
+
+    # Counting passes over the collected columns, each one in C
+    stats["by_source"] = Counter(sources)
+    stats["by_extraction_method"] = Counter(methods)
+    stats["by_image_type"] = Counter(img_types)
+    # One C-level counting pass, sorted once for chronological output
+    stats["by_month"] = dict(sorted(Counter(months).items()))
     
     if image_count > 0:
-        stats["image_sizes"]["min"] = min_size if min_size != float('inf') else 0
-        stats["image_sizes"]["max"] = max_size
+        total_size = sum(matched_sizes)
+        stats["image_sizes"]["min"] = min(matched_sizes, default=0)
+        stats["image_sizes"]["max"] = max(matched_sizes, default=0)
         stats["image_sizes"]["avg"] = total_size / image_count
         stats["image_sizes"]["total"] = total_size
     
@@ -121,8 +312,9 @@ def generate_statistics(index: dict) -> dict | None:
     if latest_timestamp:
         stats["last_image"] = latest_timestamp.isoformat()
     
-    # Sort the monthly data
-    stats["by_month"] = dict(sorted(stats["by_month"].items()))
+    # A sorted list serializes cleanly (JSON has no set type) and keeps
+    # exports diff-friendly
+    stats["blocks"] = sorted(stats["blocks"])
     
     return stats
 
@@ -132,6 +324,7 @@ def format_bytes(size: int) -> str:
         if size < 1024.0:
             return f"{size:.2f} {unit}"
         size /= 1024.0
+    return f"{size:.2f} PB"
 
 def print_text_stats(stats: dict) -> None:
     """Print statistics in text format"""
@@ -173,60 +366,56 @@ def print_text_stats(stats: dict) -> None:
 
 def export_json_stats(stats: dict, filename: str = "image_stats.json") -> None:
     """Export statistics as JSON"""
-    with open(filename, "w") as f:
-        json.dump(stats, f, indent=2)
+    def json_serializer(obj):
+        if isinstance(obj, set):
+            return sorted(obj)
+        return str(obj)
+
+    if ORJSON_AVAILABLE:
+        with open(filename, "wb") as f:
+            f.write(orjson.dumps(stats, option=orjson.OPT_INDENT_2, default=json_serializer))
+    else:
+        with open(filename, "w") as f:
+            json.dump(stats, f, indent=2, default=json_serializer)
     print(f"Statistics exported to {filename}")
 
 def export_csv_stats(stats: dict, filename: str = "image_stats.csv") -> None:
     """Export key statistics as CSV"""
     import csv
-    
-    # Prepare data for CSV export
-    flat_data = []
-    
-    # Add monthly data
-    for month, count in stats["by_month"].items():
-        flat_data.append({
-            "category": "month",
-            "key": month,
-            "value": count
-        })
-    
-    # Add image types
-    for img_type, count in stats["by_image_type"].items():
-        flat_data.append({
-            "category": "image_type",
-            "key": img_type, 
-            "value": count
-        })
-    
-    # Add extraction methods
-    for method, count in stats["by_extraction_method"].items():
-        flat_data.append({
-            "category": "extraction_method",
-            "key": method,
-            "value": count
-        })
-    
+    import itertools
+
+    # Stream the three categories straight into the writer as tuples -
+    # no intermediate flat_data list and no per-row dict translation
+    rows = itertools.chain(
+        (("month", k, v) for k, v in stats["by_month"].items()),
+        (("image_type", k, v) for k, v in stats["by_image_type"].items()),
+        (("extraction_method", k, v) for k, v in stats["by_extraction_method"].items()),
+    )
+
     # Write CSV file
     with open(filename, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=["category", "key", "value"])
-        writer.writeheader()
-        writer.writerows(flat_data)
-    
+        writer = csv.writer(f)
+        writer.writerow(["category", "key", "value"])
+        writer.writerows(rows)
+
     print(f"Statistics exported to {filename}")
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Generate statistics about Bitcoin blockchain images")
     parser.add_argument("--output", choices=["text", "json", "csv"], default="text",
                        help="Output format (text, json, or csv)")
-    args = parser.parseArgs()
+    parser.add_argument("--streaming", action="store_true",
+                       help="Stream the index instead of loading it into memory")
+    args = parser.parse_args()
     
-    # Load the index
-    index = load_index()
-    if not index:
-        print("No image data available for analysis.")
-        return 1
+    # Load the index (streamed as (txid, entries) pairs if requested)
+    if args.streaming:
+        index = iter_index()
+    else:
+        index = load_index()
+        if not index:
+            print("No image data available for analysis.")
+            return 1
     
     # Generate statistics
     stats = generate_statistics(index)
@@ -245,4 +434,5 @@ def main() -> int:
     return 0
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     sys.exit(main())
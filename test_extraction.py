@@ -8,7 +8,7 @@ by testing against known transactions with embedded images.
 import sys
 import logging
 from utils import (
-    get_rpc_connection,
+    rpc_batch,
     extract_images_from_witness,
     extract_images_from_op_return,
     extract_images_from_corrupted_outputs,
@@ -17,7 +17,6 @@ from utils import (
 )
 
 logger = logging.getLogger("test_extraction")
-logging.basicConfig(level=logging.INFO)
 
 # Known test cases for each extraction method
 TEST_TXIDS = {
@@ -44,14 +43,20 @@ TEST_TXIDS = {
     ]
 }
 
-def test_extraction_method(extraction_type: str, txid: str) -> bool:
-    """Test a specific extraction method with a known transaction"""
+def fetch_test_txs() -> dict:
+    """
+    Fetch every test transaction in a single batched JSON-RPC call.
+    One HTTP round-trip replaces one per txid.
+    """
+    all_txids = [txid for txids in TEST_TXIDS.values() for txid in txids]
+    txs = rpc_batch([["getrawtransaction", txid, 2] for txid in all_txids])
+    return dict(zip(all_txids, txs))
+
+def test_extraction_method(extraction_type: str, txid: str, tx: dict) -> bool:
+    """Test a specific extraction method with a pre-fetched transaction"""
     logger.info(f"Testing {extraction_type} extraction with tx {txid}")
     
     try:
-        rpc = get_rpc_connection()
-        tx = rpc.getrawtransaction(txid, 2)
-        
         images = []
         
         if extraction_type == "ordinal":
@@ -89,8 +94,9 @@ def test_extraction_method(extraction_type: str, txid: str) -> bool:
             for vin_idx, vin in enumerate(tx.get('vin', [])):
                 witness = vin.get('txinwitness', [])
                 if witness:
-                    # Filter for only items starting with '50' (annex)
-                    annex_items = [w for w in witness if w.startswith('50')]
+                    # Filter for only items starting with '50' (annex);
+                    # a tuple is enough since the extractor only iterates
+                    annex_items = tuple(w for w in witness if w.startswith('50'))
                     if annex_items:
                         witness_images = extract_images_from_witness(annex_items)
                         for wit_idx, img_data, img_type in witness_images:
@@ -107,13 +113,19 @@ def test_extraction_method(extraction_type: str, txid: str) -> bool:
 
 def main() -> int:
     results = {method: 0 for method in TEST_TXIDS.keys()}
-    
+
+    try:
+        txs = fetch_test_txs()
+    except Exception as e:
+        logger.error(f"Could not fetch test transactions: {e}")
+        return 1
+
     for method, txids in TEST_TXIDS.items():
         logger.info(f"\nTesting {method.upper()} extraction method")
         logger.info("-" * 40)
         
         for txid in txids:
-            success = test_extraction_method(method, txid)
+            success = test_extraction_method(method, txid, txs[txid])
             if success:
                 results[method] += 1
     
@@ -133,4 +145,5 @@ def main() -> int:
     return 0 if all_passed else 1
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     sys.exit(main())
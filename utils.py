@@ -2,19 +2,48 @@ import os
 from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException
 from dotenv import load_dotenv
 import base64
-import tempfile
 import subprocess
 import json
 import re
+import io
+import time
+import random
+import hashlib
 from datetime import datetime
+from decimal import Decimal
 import binascii
+from PIL import Image, ImageFile, UnidentifiedImageError
 from bitcoin.core.script import CScript, OP_RETURN  # For parsing scripts with python-bitcoinlib
 import logging
+import threading
+import queue
+import atexit
+from collections import OrderedDict
 
 # IPFS support explicitly disabled
 IPFS_AVAILABLE = False
+# Library-style module: entry points configure the root logger in their
+# own __main__ blocks, importing utils must not reconfigure it
 logger = logging.getLogger("utils")
-logging.basicConfig(level=logging.INFO)
+
+# Be permissive with truncated embedded images everywhere Pillow decodes
+# them - on-chain data is frequently cut short
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+
+# Pillow linked against libjpeg-turbo (or the Pillow-SIMD fork) decodes
+# JPEGs several times faster; mention it once if this build is on scalar
+# libjpeg so the operator knows the cheap upgrade exists
+try:
+    from PIL import features as _pil_features
+    if not _pil_features.check('libjpeg_turbo'):
+        logger.info("Pillow is not linked against libjpeg-turbo - JPEG decoding will be "
+                    "slower (consider pillow-simd or a libjpeg-turbo build)")
+except Exception:
+    pass
+
+# Saved images and the index both live here; create it once at import
+# instead of re-stating it on every save
+os.makedirs("images", exist_ok=True)
 logger.info("IPFS image extraction disabled - focusing only on blockchain/mempool native images")
 
 # Original IPFS import code (commented out):
@@ -31,6 +60,14 @@ logger.info("IPFS image extraction disabled - focusing only on blockchain/mempoo
 #     except ImportError:
 #         logger.warning("Neither ipfshttpclient nor requests available. IPFS image retrieval will be disabled.")
 
+# orjson parses large JSON documents 3-5x faster than stdlib json;
+# fall back to the stdlib when it isn't installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -40,8 +77,259 @@ rpc_password = os.getenv("BITCOIN_RPC_PASSWORD")
 rpc_host = os.getenv("BITCOIN_RPC_HOST")
 rpc_port = os.getenv("BITCOIN_RPC_PORT")
 
+# One AuthServiceProxy per thread: the proxy holds an HTTP keep-alive
+# connection that is not safe to share across threads, but within a thread
+# reusing it avoids paying TCP + auth setup on every call
+_rpc_local = threading.local()
+
 def get_rpc_connection():
-    return AuthServiceProxy(f"http://{rpc_user}:{rpc_password}@{rpc_host}:{rpc_port}")
+    conn = getattr(_rpc_local, "conn", None)
+    if conn is None:
+        conn = AuthServiceProxy(f"http://{rpc_user}:{rpc_password}@{rpc_host}:{rpc_port}")
+        _rpc_local.conn = conn
+    return conn
+
+def rpc_batch(calls: list) -> list:
+    """
+    Issue several JSON-RPC calls in one HTTP request via AuthServiceProxy's
+    batch mode. calls is a list of [method, arg, ...] lists; results come
+    back in the same order. One round-trip instead of len(calls).
+    """
+    return get_rpc_connection().batch_(calls)
+
+# Set when the process is shutting down; scanner loops wait on this instead
+# of bare time.sleep so shutdown is prompt
+shutdown_event = threading.Event()
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Exponential backoff with jitter for RPC error handling: transient
+    errors retry almost immediately, persistent outages back off to 30s,
+    and the jitter keeps multiple workers from hammering bitcoind in
+    lockstep after an outage clears.
+    """
+    return min(30.0, 0.1 * (2 ** attempt)) + random.uniform(0, 0.5)
+
+# Where in its lifecycle a seen transaction was last observed. A tx first
+# seen in the mempool is only *promoted* to confirmed when its block
+# arrives - extraction doesn't depend on confirmation, so process_tx is
+# never re-run for it.
+TX_STATUS_MEMPOOL = "mempool"
+TX_STATUS_CONFIRMED = "confirmed"
+
+class BoundedTxidCache:
+    """
+    Bounded replacement for the unbounded `seen_txids` set shared by the
+    scanners. Keeps only the most recently seen txids (LRU eviction), so
+    memory stays constant no matter how long the process runs. Txid access
+    has strong temporal locality, so evicting old entries only risks the
+    occasional reprocess of a very old transaction.
+
+    Each entry carries a status (TX_STATUS_MEMPOOL or TX_STATUS_CONFIRMED)
+    so the block scanner can tell "already extracted from mempool" apart
+    from "never seen" and skip redundant process_tx calls.
+    """
+    def __init__(self, maxlen: int = 131072):
+        self.maxlen = maxlen
+        self._cache = OrderedDict()
+
+    def add(self, txid: str, status: str = TX_STATUS_CONFIRMED) -> None:
+        self._cache[txid] = status
+        self._cache.move_to_end(txid)
+        if len(self._cache) > self.maxlen:
+            self._cache.popitem(last=False)
+
+    def get(self, txid: str) -> str | None:
+        """Return the recorded status for txid, or None if unseen"""
+        status = self._cache.get(txid)
+        if status is not None:
+            self._cache.move_to_end(txid)
+        return status
+
+    def __contains__(self, txid: str) -> bool:
+        if txid in self._cache:
+            self._cache.move_to_end(txid)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Read a Bitcoin varint, returning (value, new_position)"""
+    prefix = data[pos]
+    if prefix < 0xfd:
+        return prefix, pos + 1
+    elif prefix == 0xfd:
+        return int.from_bytes(data[pos + 1:pos + 3], 'little'), pos + 3
+    elif prefix == 0xfe:
+        return int.from_bytes(data[pos + 1:pos + 5], 'little'), pos + 5
+    else:
+        return int.from_bytes(data[pos + 1:pos + 9], 'little'), pos + 9
+
+def _classify_script(spk: bytes) -> str:
+    """Minimal scriptPubKey type classification (standard templates only)"""
+    if spk[:1] == b'\x6a':
+        return 'nulldata'
+    if len(spk) == 25 and spk[:3] == b'\x76\xa9\x14' and spk[23:] == b'\x88\xac':
+        return 'pubkeyhash'
+    if len(spk) == 23 and spk[:2] == b'\xa9\x14' and spk[22:] == b'\x87':
+        return 'scripthash'
+    if len(spk) == 22 and spk[:2] == b'\x00\x14':
+        return 'witness_v0_keyhash'
+    if len(spk) == 34 and spk[:2] == b'\x00\x20':
+        return 'witness_v0_scripthash'
+    if len(spk) == 34 and spk[:2] == b'\x51\x20':
+        return 'witness_v1_taproot'
+    return 'nonstandard'
+
+def _op_return_asm(spk: bytes) -> str:
+    """
+    Build a minimal asm string ("OP_RETURN <hex> ...") for an OP_RETURN
+    scriptPubKey, which is the only asm shape the extractors rely on.
+    """
+    pushes = []
+    pos = 1  # skip the OP_RETURN byte
+    try:
+        while pos < len(spk):
+            op = spk[pos]
+            pos += 1
+            if op <= 0x4b:
+                length = op
+            elif op == 0x4c:  # OP_PUSHDATA1
+                length = spk[pos]
+                pos += 1
+            elif op == 0x4d:  # OP_PUSHDATA2
+                length = int.from_bytes(spk[pos:pos + 2], 'little')
+                pos += 2
+            elif op == 0x4e:  # OP_PUSHDATA4
+                length = int.from_bytes(spk[pos:pos + 4], 'little')
+                pos += 4
+            else:
+                # Non-push opcode - just dump the remainder as hex
+                pushes.append(spk[pos - 1:].hex())
+                break
+            pushes.append(spk[pos:pos + length].hex())
+            pos += length
+    except IndexError:
+        pushes.append(spk[1:].hex())
+    return 'OP_RETURN ' + ' '.join(p for p in pushes if p)
+
+def decode_raw_transaction(raw_hex: str) -> dict:
+    """
+    Decode a raw transaction hex string locally into the dict shape that
+    process_tx expects (txid, vin with txinwitness, vout with scriptPubKey).
+
+    This lets callers fetch transactions with getrawtransaction verbosity 0
+    (raw hex) instead of verbosity 2, which avoids bitcoind JSON-encoding
+    the full decoded transaction - far fewer bytes over the RPC socket and
+    no server-side decode cost.
+    """
+    raw = bytes.fromhex(raw_hex)
+    pos = 0
+
+    version = int.from_bytes(raw[0:4], 'little')
+    pos = 4
+
+    # Segwit marker + flag
+    is_segwit = raw[pos] == 0x00 and raw[pos + 1] == 0x01
+    if is_segwit:
+        pos += 2
+
+    n_in, pos = _read_varint(raw, pos)
+    vin = []
+    for _ in range(n_in):
+        prev_txid = raw[pos:pos + 32][::-1].hex()
+        prev_vout = int.from_bytes(raw[pos + 32:pos + 36], 'little')
+        pos += 36
+        script_len, pos = _read_varint(raw, pos)
+        script_sig = raw[pos:pos + script_len]
+        pos += script_len
+        sequence = int.from_bytes(raw[pos:pos + 4], 'little')
+        pos += 4
+        vin.append({
+            'txid': prev_txid,
+            'vout': prev_vout,
+            'scriptSig': {'hex': script_sig.hex()},
+            'sequence': sequence
+        })
+
+    n_out, pos = _read_varint(raw, pos)
+    vout = []
+    for out_idx in range(n_out):
+        value_sats = int.from_bytes(raw[pos:pos + 8], 'little')
+        pos += 8
+        script_len, pos = _read_varint(raw, pos)
+        spk = raw[pos:pos + script_len]
+        pos += script_len
+        script_pub_key = {
+            'hex': spk.hex(),
+            'type': _classify_script(spk)
+        }
+        if spk[:1] == b'\x6a':
+            script_pub_key['asm'] = _op_return_asm(spk)
+        vout.append({
+            'value': value_sats / 1e8,
+            'n': out_idx,
+            'scriptPubKey': script_pub_key
+        })
+
+    if is_segwit:
+        for vin_entry in vin:
+            n_items, pos = _read_varint(raw, pos)
+            witness = []
+            for _ in range(n_items):
+                item_len, pos = _read_varint(raw, pos)
+                witness.append(raw[pos:pos + item_len].hex())
+                pos += item_len
+            if witness:
+                vin_entry['txinwitness'] = witness
+
+    locktime = int.from_bytes(raw[pos:pos + 4], 'little')
+    pos += 4
+
+    # txid is the double-SHA256 of the serialization without marker/flag/witness
+    if is_segwit:
+        stripped = bytearray(raw[0:4])
+        # Re-serialize inputs/outputs without the witness section
+        body_start = 6  # version + marker + flag
+        witness_start = None
+        # Walk the original buffer again to find where the witness begins
+        p = body_start
+        count, p = _read_varint(raw, p)
+        for _ in range(count):
+            p += 36
+            slen, p = _read_varint(raw, p)
+            p += slen + 4
+        count, p = _read_varint(raw, p)
+        for _ in range(count):
+            p += 8
+            slen, p = _read_varint(raw, p)
+            p += slen
+        witness_start = p
+        stripped += raw[body_start:witness_start]
+        stripped += raw[-4:]  # locktime
+        txid = hashlib.sha256(hashlib.sha256(bytes(stripped)).digest()).digest()[::-1].hex()
+    else:
+        txid = hashlib.sha256(hashlib.sha256(raw).digest()).digest()[::-1].hex()
+
+    return {
+        'txid': txid,
+        'version': version,
+        'locktime': locktime,
+        'size': len(raw),
+        'vin': vin,
+        'vout': vout
+    }
+
+# Image filter settings, read from the environment once at import (the
+# .env file is loaded above) instead of per transaction
+_MIN_IMAGE_SIZE = int(os.environ.get("MIN_IMAGE_SIZE", 30))  # Lowered from 100 to 30
+_STRICT_VALIDATION = os.environ.get("STRICT_VALIDATION", "0") == "1"  # Default to less strict
+_SKIP_DISPLAY = os.environ.get("SKIP_DISPLAY", "0") == "1"
+_ALLOWED_FORMATS = frozenset(
+    os.environ.get("ALLOWED_FORMATS", "png,jpeg,gif,bmp,webp").lower().split(","))  # Added webp
+_FORCE_SAVE_INVALID = os.environ.get("FORCE_SAVE_INVALID", "1") == "1"  # Save invalid images for research
 
 def process_tx(tx: dict, block_height: int = None, is_mempool: bool = False) -> None:
     """
@@ -52,29 +340,34 @@ def process_tx(tx: dict, block_height: int = None, is_mempool: bool = False) ->
     - IPFS references
     """
     txid = tx.get('txid')
+
+    # Module-level filter settings, bound to the names the helpers use
+    min_size = _MIN_IMAGE_SIZE
+    strict_validation = _STRICT_VALIDATION
+    skip_display = _SKIP_DISPLAY
+    allowed_formats = _ALLOWED_FORMATS
+    force_save_invalid = _FORCE_SAVE_INVALID
     
-    # Get filter settings from environment
-    min_size = int(os.environ.get("MIN_IMAGE_SIZE", 30))  # Lowered from 100 to 30
-    strict_validation = os.environ.get("STRICT_VALIDATION", "0") == "1"  # Default to less strict
-    skip_display = os.environ.get("SKIP_DISPLAY", "0") == "1"
-    allowed_formats = os.environ.get("ALLOWED_FORMATS", "png,jpeg,gif,bmp,webp").lower().split(",")  # Added webp
-    force_save_invalid = os.environ.get("FORCE_SAVE_INVALID", "1") == "1"  # Save invalid images for research
-    
-    def should_process_image(img_data: bytes, img_type: str) -> bool:
-        """Helper to check if image meets our filter criteria"""
+    def should_process_image(img_data: bytes, img_type: str) -> tuple[bool, bool]:
+        """
+        Helper to check if image meets our filter criteria.
+
+        Returns (keep, validated); validated is True when the strict path
+        already fully decoded this buffer, so display_image can skip its
+        own redundant decode of the same bytes.
+        """
+        validated = False
         if len(img_data) < min_size:
             logger.info(f"[FILTER] Skipping image: too small ({len(img_data)} bytes < {min_size} bytes)")
-            return False
-            
+            return False, validated
+
         if img_type not in allowed_formats:
             logger.info(f"[FILTER] Skipping image: format not allowed ({img_type} not in {allowed_formats})")
-            return False
+            return False, validated
             
         # Always perform basic validation, regardless of strict_validation setting
         # to catch extremely corrupted data early
-        import io
-        from PIL import Image, ImageFile, UnidentifiedImageError
-        
+
         # For JPEG/BMP/WEBP files, do special checks for common corruption patterns
         if img_type in ('jpeg', 'jpg', 'bmp', 'webp'):
             # Check for common bad JPEG patterns
@@ -91,13 +384,13 @@ def process_tx(tx: dict, block_height: int = None, is_mempool: bool = False) ->
                         logger.info(f"[FILTER] Detected likely corrupt JPEG with {seq.hex()} sequence")
                         # Don't return here - we'll still process and save as invalid for research
                         if not force_save_invalid:
-                            return False
+                            return False, validated
             
             # Check for truncated BMP files
             if img_type == 'bmp' and len(img_data) < 54:
                 logger.info("[FILTER] BMP header too small (likely truncated)")
                 if not force_save_invalid:
-                    return False
+                    return False, validated
             
             # For webp, skip extra corruption checks for now (Pillow will handle most)
             pass
@@ -105,18 +398,16 @@ def process_tx(tx: dict, block_height: int = None, is_mempool: bool = False) ->
         # For strict validation, try to open and process the image
         if strict_validation:
             try:
-                # Use permissive mode for initial check - we'll do stricter validation later
-                ImageFile.LOAD_TRUNCATED_IMAGES = True
-                
                 with Image.open(io.BytesIO(img_data)) as img:
                     # Try to load the image to validate it
                     try:
                         img.load()
+                        validated = True
                         # Get image dimensions to further validate
                         if img.width < 4 or img.height < 4:
                             logger.info(f"[FILTER] Image dimensions too small ({img.width}x{img.height})")
                             if not force_save_invalid:
-                                return False
+                                return False, validated
                             
                         # Additional check for JPEGs - try to transcode
                         if img_type in ('jpeg', 'jpg'):
@@ -128,54 +419,55 @@ def process_tx(tx: dict, block_height: int = None, is_mempool: bool = False) ->
                                 logger.info(f"[FILTER] Image transcode test failed: {transcode_error}")
                                 # Still continue if we want to save invalid images
                                 if not force_save_invalid:
-                                    return False
+                                    return False, validated
                     except Exception as load_error:
                         logger.info(f"[FILTER] Image load failed: {load_error}")
                         # Still continue if we want to save invalid images
                         if not force_save_invalid:
-                            return False
+                            return False, validated
             except UnidentifiedImageError:
                 logger.info("[FILTER] Image format could not be identified")
                 if not force_save_invalid:
-                    return False
+                    return False, validated
             except Exception as e:
                 logger.info(f"[FILTER] Image validation failed: {e}")
                 if not force_save_invalid:
-                    return False
+                    return False, validated
                 
-        return True
-    
+        return True, validated
+
+    # Phase 1: run every extractor up front and collect candidates, so the
+    # pure byte scanning isn't interleaved with PIL decodes and index
+    # writes - those all happen together in the emit pass below
+    candidates = []
+
     # 1. Check transaction inputs for witness data
     for vin_idx, vin in enumerate(tx.get('vin', [])):
         witness = vin.get('txinwitness', [])
         if witness:
-            images = extract_images_from_witness(witness)
-            for wit_idx, img_data, img_type in images:
-                if should_process_image(img_data, img_type):
-                    logger.info(f"[WITNESS] Image found in tx {txid}")
-                    display_image(img_data, img_type, txid=txid, vin_idx=vin_idx, 
-                                wit_idx=wit_idx, block_height=block_height, 
-                                tx=tx, is_mempool=is_mempool, source_type="witness",
-                                skip_display=skip_display)
-    
+            for wit_idx, img_data, img_type in extract_images_from_witness(witness):
+                candidates.append((img_data, img_type, "witness",
+                                   {'vin_idx': vin_idx, 'wit_idx': wit_idx}))
+
     # 2. Check OP_RETURN outputs
-    op_return_images = extract_images_from_op_return(tx)
-    for img_data, img_type in op_return_images:
-        if should_process_image(img_data, img_type):
-            logger.info(f"[OP_RETURN] Image found in tx {txid}")
-            display_image(img_data, img_type, txid=txid, block_height=block_height,
-                        tx=tx, is_mempool=is_mempool, source_type="op_return",
-                        skip_display=skip_display)
-    
+    for img_data, img_type in extract_images_from_op_return(tx):
+        candidates.append((img_data, img_type, "op_return", {}))
+
     # 3. Check for corrupted/non-standard outputs
-    corrupted_images = extract_images_from_corrupted_outputs(tx)
-    for img_data, img_type in corrupted_images:
-        if should_process_image(img_data, img_type):
-            logger.info(f"[CORRUPTED] Image found in tx {txid}")
+    for img_data, img_type in extract_images_from_corrupted_outputs(tx):
+        candidates.append((img_data, img_type, "corrupted_output", {}))
+
+    # Phase 2: filter and save the survivors in one pass
+    log_tags = {"witness": "WITNESS", "op_return": "OP_RETURN",
+                "corrupted_output": "CORRUPTED"}
+    for img_data, img_type, source_type, extra in candidates:
+        keep, validated = should_process_image(img_data, img_type)
+        if keep:
+            logger.info(f"[{log_tags[source_type]}] Image found in tx {txid}")
             display_image(img_data, img_type, txid=txid, block_height=block_height,
-                        tx=tx, is_mempool=is_mempool, source_type="corrupted_output",
-                        skip_display=skip_display)
-    
+                        tx=tx, is_mempool=is_mempool, source_type=source_type,
+                        skip_display=skip_display, validated=validated, **extra)
+
     # IPFS extraction disabled - only focusing on blockchain/mempool native images
     # 4. Check for IPFS references 
     # Commented out as we're focusing only on blockchain-native images
@@ -185,46 +477,481 @@ def process_tx(tx: dict, block_height: int = None, is_mempool: bool = False) ->
     #     display_image(img_data, img_type, txid=txid, block_height=block_height,
     #                   tx=tx, is_mempool=is_mempool, source_type="ipfs")
 
+STATE_FILE = "state.json"
+
+# Scanner state lives in memory and is flushed to disk at most every
+# STATE_FLUSH_EVERY blocks or STATE_FLUSH_INTERVAL seconds, whichever
+# comes first, instead of read-parse-rewrite on every single block
+STATE_FLUSH_EVERY = 100
+STATE_FLUSH_INTERVAL = 5.0
+
+_state = None            # in-memory copy of state.json, loaded lazily
+_state_lock = threading.Lock()
+_state_dirty = False
+_state_blocks_since_flush = 0
+_state_last_flush = 0.0
+
+def _load_state() -> dict:
+    """Load state.json into the in-memory copy. Caller holds _state_lock."""
+    global _state
+    if _state is None:
+        _state = {}
+        if os.path.isfile(STATE_FILE):
+            try:
+                # Check if the file has content
+                if os.path.getsize(STATE_FILE) > 0:
+                    with open(STATE_FILE, "r") as f:
+                        _state = json.load(f)
+                else:
+                    logger.info("State file exists but is empty")
+            except Exception as e:
+                logger.error(f"Failed to load state file: {e}")
+    return _state
+
+def _flush_state() -> None:
+    """
+    Write the in-memory state atomically (tmp + os.replace, so a crash
+    mid-write can't leave a truncated state.json). Caller holds _state_lock.
+    """
+    global _state_dirty, _state_blocks_since_flush, _state_last_flush
+    try:
+        tmp_file = STATE_FILE + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(_state, f, indent=2)
+        os.replace(tmp_file, STATE_FILE)
+        _state_dirty = False
+        _state_blocks_since_flush = 0
+        _state_last_flush = time.monotonic()
+    except Exception as e:
+        logger.error(f"Failed to save state: {e}")
+
+def _flush_state_at_exit() -> None:
+    """Persist any unflushed state on interpreter shutdown"""
+    with _state_lock:
+        if _state_dirty:
+            _flush_state()
+
+atexit.register(_flush_state_at_exit)
+
 def get_last_processed_block() -> int | None:
     """
-    Load the last processed block height from a state file
+    Load the last processed block height from the state file
+    """
+    with _state_lock:
+        return _load_state().get("last_block_height")
+
+def save_last_processed_block(block_height: int) -> None:
+    """
+    Record the last processed block height, flushing to the state file
+    on the debounce schedule above
+    """
+    global _state_dirty, _state_blocks_since_flush
+    with _state_lock:
+        state = _load_state()
+        state["last_block_height"] = block_height
+        state["last_updated"] = datetime.utcnow().isoformat()
+        _state_dirty = True
+        _state_blocks_since_flush += 1
+        if (_state_blocks_since_flush >= STATE_FLUSH_EVERY
+                or time.monotonic() - _state_last_flush > STATE_FLUSH_INTERVAL):
+            _flush_state()
+            logger.info(f"Saved last processed block height: {block_height}")
+
+def _json_serializer(obj):
+    """Fallback for index values json can't encode (Decimal fees etc.)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return str(obj)
+
+def _dump_json_bytes(obj) -> bytes:
+    """
+    Serialize for the hot index write paths: orjson when available,
+    always compact - pretty-printing stays confined to compact_index
+    where a human might actually read the output.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_json_serializer)
+    return json.dumps(obj, default=_json_serializer).encode()
+
+INDEX_FILE = "images/index.json"
+INDEX_JSONL = "images/index.jsonl"
+
+# Parsed copy of the image index, shared by every reader and invalidated
+# by file mtime so the JSON is only re-parsed when it actually changed
+_index_cache = None
+_index_cache_mtime = None
+
+def _register_dedup_entry(by_pos: dict, by_hash: dict, txid: str, entry: dict) -> None:
+    """Record an entry in the O(1) dedup side maps"""
+    by_pos.setdefault(txid, {})[(entry.get("vin_idx"), entry.get("wit_idx"))] = entry
+    image_hash = entry.get("image_hash")
+    if image_hash:
+        by_hash.setdefault(txid, {})[image_hash] = entry
+
+def _find_existing_entry(index: dict, txid: str, entry: dict,
+                         by_pos: dict = None, by_hash: dict = None) -> dict | None:
+    """
+    Find the entry that dedups against `entry`: a match shares
+    (vin_idx, wit_idx) or the same image_hash. With side maps this is two
+    dict lookups; without them it falls back to the linear scan.
+    """
+    if by_pos is not None:
+        existing = by_pos.get(txid, {}).get((entry.get("vin_idx"), entry.get("wit_idx")))
+        if existing is None and entry.get("image_hash"):
+            existing = by_hash.get(txid, {}).get(entry["image_hash"])
+        return existing
+    for existing_entry in index.get(txid, ()):
+        if ((existing_entry.get("vin_idx") == entry.get("vin_idx") and
+             existing_entry.get("wit_idx") == entry.get("wit_idx")) or
+                (entry.get("image_hash") and
+                 existing_entry.get("image_hash") == entry.get("image_hash"))):
+            return existing_entry
+    return None
+
+def _apply_index_entry(index: dict, txid: str, entry: dict,
+                       by_pos: dict = None, by_hash: dict = None) -> bool:
+    """
+    Merge a single entry into the index dict, applying the same dedup rules
+    the writer uses: entries match if they share (vin_idx, wit_idx) or the
+    same image_hash. A matching entry without block information is promoted
+    in place when the new entry carries a block height.
+    Returns True if the index changed (entry added or updated).
     """
-    state_file = "state.json"
-    if os.path.isfile(state_file):
+    entries = index.get(txid)
+    if entries is None:
+        index[txid] = [entry]
+        if by_pos is not None:
+            _register_dedup_entry(by_pos, by_hash, txid, entry)
+        return True
+
+    existing_entry = _find_existing_entry(index, txid, entry, by_pos, by_hash)
+    if existing_entry is not None:
+        block_height = entry.get("block_height")
+        if block_height and not existing_entry.get("block_height"):
+            existing_entry.update({
+                "block_height": block_height,
+                "source": "block",
+                "timestamp": entry.get("timestamp")
+            })
+            logger.info(f"Updated existing entry with block information: {block_height}")
+            return True
+        return False
+
+    entries.append(entry)
+    if by_pos is not None:
+        _register_dedup_entry(by_pos, by_hash, txid, entry)
+    return True
+
+def _load_index_from_disk(index_file: str = INDEX_FILE, jsonl_file: str = INDEX_JSONL) -> dict:
+    """
+    Load the image index: the compacted index.json (if present) plus any
+    entries appended to index.jsonl since the last compaction.
+    """
+    index = {}
+    try:
+        if os.path.isfile(index_file):
+            with open(index_file, "rb") as f:
+                data = f.read()
+            if data:
+                index = orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+    except Exception as e:
+        logger.error(f"Failed to load index {index_file}: {e}")
+
+    try:
+        if os.path.isfile(jsonl_file):
+            with open(jsonl_file, "rb") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
+                        txid = record.pop("txid", None)
+                        if txid:
+                            _apply_index_entry(index, txid, record)
+                    except Exception:
+                        logger.warning(f"Skipping corrupt index line: {line[:60]}...")
+    except Exception as e:
+        logger.error(f"Failed to load index log {jsonl_file}: {e}")
+
+    return index
+
+def load_index_cached(index_file: str = INDEX_FILE) -> dict:
+    """
+    Load the image index, caching the parsed dict and re-reading the files
+    only when their mtimes change. Returns {} if no index exists yet.
+    """
+    global _index_cache, _index_cache_mtime
+
+    mtimes = []
+    for path in (index_file, INDEX_JSONL):
         try:
-            # Check if the file has content
-            if os.path.getsize(state_file) > 0:
-                with open(state_file, "r") as f:
-                    state = json.load(f)
-                    return state.get("last_block_height")
-            else:
-                logger.info("State file exists but is empty")
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    mtimes = tuple(mtimes)
+    if mtimes == (None, None):
+        return {}
+
+    if _index_cache is None or mtimes != _index_cache_mtime:
+        _index_cache = _load_index_from_disk(index_file)
+        _index_cache_mtime = mtimes
+
+    return _index_cache
+
+# In-memory index used by the writer side (update_index); loaded from disk
+# once and kept authoritative for the lifetime of the process. The side
+# maps mirror it so dedup on insert is two dict lookups instead of a
+# scan over every existing entry for the txid
+_live_index = None
+_live_by_pos = {}
+_live_by_hash = {}
+
+# Serializes index mutation + log append so scanners may run process_tx
+# for several transactions concurrently without interleaving jsonl lines
+_index_lock = threading.Lock()
+
+def _get_live_index() -> dict:
+    global _live_index
+    if _live_index is None:
+        _live_index = _load_index_from_disk()
+        for txid, entries in _live_index.items():
+            for existing_entry in entries:
+                _register_dedup_entry(_live_by_pos, _live_by_hash, txid, existing_entry)
+    return _live_index
+
+# Debounce for materializing index.json from the in-memory view: rewrite
+# it only after this many new entries or this many seconds, whichever
+# comes first, so total bytes written stays O(N) across a scan instead
+# of O(N^2) from rewriting the whole file per image
+MATERIALIZE_EVERY = 256
+MATERIALIZE_INTERVAL = 10.0
+
+_entries_since_materialize = 0
+_last_materialize = 0.0
+
+def _materialize_index(index_file: str = INDEX_FILE) -> None:
+    """
+    Rewrite index.json from the in-memory index (tempfile + os.replace so
+    readers never see a partial file). The jsonl log stays authoritative;
+    this is just a periodically refreshed materialized view for readers.
+    Caller must hold _index_lock.
+    """
+    global _entries_since_materialize, _last_materialize
+    try:
+        tmp_path = index_file + ".tmp"
+        with open(tmp_path, "wb") as jf:
+            jf.write(_dump_json_bytes(_get_live_index()))
+            # Make sure the bytes are on disk before the rename swaps the
+            # file in, so a crash can't promote an empty tmp file
+            jf.flush()
+            os.fsync(jf.fileno())
+        os.replace(tmp_path, index_file)
+        _entries_since_materialize = 0
+        _last_materialize = time.monotonic()
+    except Exception as e:
+        logger.error(f"Could not materialize index {index_file}: {e}")
+
+def _flush_index_at_exit() -> None:
+    """Materialize any entries still pending when the process exits"""
+    with _index_lock:
+        if _entries_since_materialize:
+            _materialize_index()
+
+atexit.register(_flush_index_at_exit)
+
+def update_index(txid: str, entry: dict) -> bool:
+    """
+    Record a saved image in the index. The entry is merged into the
+    in-memory index and, if it added or changed anything, appended as a
+    single line to images/index.jsonl - an O(1) write instead of
+    rewriting the whole monolithic index.json per image.
+    Returns True if the index changed.
+    """
+    with _index_lock:
+        index = _get_live_index()
+        changed = _apply_index_entry(index, txid, entry, _live_by_pos, _live_by_hash)
+        if changed:
+            try:
+                record = {"txid": txid}
+                record.update(entry)
+                with open(INDEX_JSONL, "ab", buffering=1 << 16) as jf:
+                    jf.write(_dump_json_bytes(record) + b"\n")
+                logger.info(f"Index log updated at {INDEX_JSONL}")
+            except Exception as e:
+                logger.error(f"Could not update {INDEX_JSONL}: {e}")
+            global _entries_since_materialize
+            _entries_since_materialize += 1
+            if (_entries_since_materialize >= MATERIALIZE_EVERY
+                    or time.monotonic() - _last_materialize >= MATERIALIZE_INTERVAL):
+                _materialize_index()
+    return changed
+
+def promote_tx_to_block(txid: str, block_height: int) -> bool:
+    """
+    Backfill block information onto a tx's existing index entries. The
+    scanners skip re-extraction when a mempool transaction confirms, so
+    this pushes block_height/source through the same dedup/promote path
+    update_index uses (and the same jsonl log, so replay stays correct).
+    Returns True if any entry was updated.
+    """
+    with _index_lock:
+        entries = _get_live_index().get(txid)
+        if not entries:
+            return False
+        # Snapshot before releasing the lock; update_index re-acquires it
+        pending = [e for e in entries if not e.get("block_height")]
+    if not pending:
+        return False
+    timestamp = datetime.utcnow().isoformat()
+    changed = False
+    for existing_entry in pending:
+        promoted = dict(existing_entry)
+        promoted.update({
+            "block_height": block_height,
+            "source": "block",
+            "timestamp": timestamp
+        })
+        if update_index(txid, promoted):
+            changed = True
+    return changed
+
+def compact_index(index_file: str = INDEX_FILE, jsonl_file: str = INDEX_JSONL) -> None:
+    """
+    Rewrite the compacted index.json from the merged view and truncate the
+    append-only log. Atomic via write-temp-then-rename.
+    """
+    index = _get_live_index()
+    try:
+        tmp_path = index_file + ".tmp"
+        with open(tmp_path, "w") as jf:
+            json.dump(index, jf, indent=2, default=_json_serializer)
+        os.replace(tmp_path, index_file)
+        if os.path.isfile(jsonl_file):
+            os.remove(jsonl_file)
+        logger.info(f"Compacted index written to {index_file}")
+    except Exception as e:
+        logger.error(f"Could not compact index {index_file}: {e}")
+
+def load_checkpoint(path: str) -> dict | None:
+    """
+    Load a scan checkpoint file. Returns the checkpoint dict, or None if
+    the file is missing or unreadable.
+    """
+    if os.path.isfile(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
         except Exception as e:
-            logger.error(f"Failed to load state file: {e}")
+            logger.error(f"Failed to load checkpoint {path}: {e}")
     return None
 
-def save_last_processed_block(block_height: int) -> None:
+def save_checkpoint(path: str, data: dict) -> None:
     """
-    Save the last processed block height to a state file
+    Atomically save a scan checkpoint (write to a temp file, then rename)
+    so an interrupted write can never leave a corrupt checkpoint behind.
     """
-    state_file = "state.json"
     try:
-        state = {}
-        if os.path.isfile(state_file):
-            try:
-                with open(state_file, "r") as f:
-                    state = json.load(f)
-            except:
-                pass
-        
-        state["last_block_height"] = block_height
-        state["last_updated"] = datetime.utcnow().isoformat()
-        
-        with open(state_file, "w") as f:
-            json.dump(state, f, indent=2)
-        logger.info(f"Saved last processed block height: {block_height}")
+        data["last_updated"] = datetime.utcnow().isoformat()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
     except Exception as e:
-        logger.error(f"Failed to save state: {e}")
+        logger.error(f"Failed to save checkpoint {path}: {e}")
+
+def clear_checkpoint(path: str) -> None:
+    """Remove a checkpoint file after a scan completes cleanly"""
+    try:
+        if os.path.isfile(path):
+            os.remove(path)
+    except Exception as e:
+        logger.error(f"Failed to remove checkpoint {path}: {e}")
+
+# Deletes every non-hex character in one C pass; feeding the result to
+# bytes.fromhex replaces the per-character Python validation loops
+_HEX_KEEP = str.maketrans('', '', ''.join(
+    chr(c) for c in range(256) if chr(c) not in '0123456789abcdefABCDEF'))
+
+# All image magic numbers as one alternation so a buffer is scanned for
+# every format in a single C-level regex pass instead of once per format.
+# RIFF is only WEBP's container, so hits need the offset-8 'WEBP' tag
+# confirmed (identify_image_type does this) before they count
+_MAGIC_RE = re.compile(
+    b'\x89PNG\r\n\x1a\n'   # png
+    b'|\xff\xd8\xff'         # jpeg
+    b'|GIF8[79]a'               # gif
+    b'|BM'                      # bmp
+    b'|RIFF'                    # webp container
+)
+
+_MAGIC_TYPES = {
+    b'\x89': 'png',
+    b'\xff': 'jpeg',
+    b'G': 'gif',
+    b'B': 'bmp',
+    b'R': 'webp',
+}
+
+# Header of chunked OP_RETURN image uploads: IMG_PART_<id>_<part>_<total>
+_IMG_PART_RE = re.compile(rb'IMG_PART_([0-9a-f]+)_([0-9]+)_([0-9]+)')
+
+# Full signatures keyed by first byte so identify_image_type dispatches
+# with one dict lookup instead of a startswith per format. WEBP sits in
+# a RIFF container, so its format tag is confirmed at offset 8 below.
+_MAGIC_SIGS = {
+    0x89: ((b'\x89PNG\r\n\x1a\n', 'png'),),
+    0xff: ((b'\xff\xd8\xff', 'jpeg'),),
+    ord('G'): ((b'GIF89a', 'gif'), (b'GIF87a', 'gif')),
+    ord('B'): ((b'BM', 'bmp'),),
+    ord('R'): ((b'RIFF', 'webp'),),
+}
+
+# Expected signature per reported type for validate_image, checked with
+# one tuple-aware startswith; WEBP's RIFF container also carries a
+# format tag at offset 8, so it gets a callable instead
+_SIGS = {
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'jpeg': (b'\xff\xd8\xff',),
+    'gif': (b'GIF87a', b'GIF89a'),
+    'bmp': (b'BM',),
+    'webp': lambda b: b[:4] == b'RIFF' and b[8:12] == b'WEBP',
+}
+
+# Byte patterns that show up in JPEGs with Bad Huffman Code corruption
+_JPEG_BAD_RE = re.compile(rb'\xff\x00\xff|\xff\xc0\x00|\xef\xbf\xbd')
+
+# Marker bytes that merely *suggest* a damaged JPEG stream
+_JPEG_SUSPECT_RE = re.compile(rb'\xff\x47|\xff\xf0')
+
+# Matches a string that is entirely hex digits
+_HEX_RE = re.compile(r'[0-9a-fA-F]+\Z')
+
+# Per-thread reusable BytesIO for validate_image, so a sweep over many
+# images recycles one backing buffer per thread instead of allocating
+# and discarding a fresh stream per call
+_TLS = threading.local()
+
+def _shared_bio(data: bytes) -> io.BytesIO:
+    """Return this thread's scratch BytesIO, reset and seeded with data"""
+    bio = getattr(_TLS, 'bio', None)
+    if bio is None:
+        bio = _TLS.bio = io.BytesIO()
+    bio.seek(0)
+    bio.truncate()
+    bio.write(data)
+    bio.seek(0)
+    return bio
+
+# Shared immutable fallback for missing scriptPubKey dicts
+_EMPTY = {}
+
+# Standard script templates that can't hide raw image bytes - anything
+# else (including nonstandard) is worth sweeping for signatures
+_STANDARD_SCRIPT_TYPES = frozenset({
+    'pubkeyhash', 'scripthash', 'witness_v0_keyhash',
+    'witness_v0_scripthash', 'witness_v1_taproot', 'multisig', 'nulldata',
+})
 
 def extract_images_from_witness(witness):
     """
@@ -241,11 +968,9 @@ def extract_images_from_witness(witness):
 
         # Convert hex string to bytes
         try:
-            # Check if string is valid hex before converting
-            if not all(c in '0123456789abcdefABCDEF' for c in item):
-                # Try to clean up the string - only keep hex characters
-                clean_hex = ''.join(c for c in item if c in '0123456789abcdefABCDEF')
-                
+            # Strip any non-hex characters in one C-level translate pass
+            clean_hex = item.translate(_HEX_KEEP)
+            if len(clean_hex) != len(item):
                 # Make sure length is even (required for bytes.fromhex)
                 if len(clean_hex) % 2 != 0:
                     clean_hex = clean_hex[:-1]
@@ -274,45 +999,46 @@ def extract_images_from_witness(witness):
             logger.error(f"Failed to parse witness data: {e}, item starts with: {item[:20]}...")
             continue
 
-        # Try Ordinal inscription detection with more robust parsing
-        if b'\x00c\x03ord' in bin_data or b'ord' in bin_data:
+        # Try Ordinal inscription detection with more robust parsing.
+        # Gate on the full inscription envelope (OP_FALSE OP_IF "ord" then
+        # the content-type tag) - a bare b'ord' substring matches random
+        # witness bytes far too often and every false hit used to pay for
+        # a full CScript parse
+        if b'\x00\x63\x03ord\x01' in bin_data:
             try:
                 script = CScript(bin_data)
-                # Iterate through script operations to find content type and data
-                script_ops = list(script.raw_iter())
+                # Walk script operations lazily to find content type and
+                # data; next() gives the one-op lookahead the envelope
+                # needs without materializing every push into a list
+                script_ops = script.raw_iter()
                 found_ord = False
                 content_type = None
-                img_data = None
                 content_data = None
-                i = 0
-                
-                # First pass: look for the ord marker and metadata
-                while i < len(script_ops):
+
+                # Look for the ord marker and metadata
+                for op, data, _ in script_ops:
                     try:
-                        op, data, _ = script_ops[i]
-                        
                         # Check for the ord marker pattern
                         if data == b'ord':
                             found_ord = True
-                        
+
                         # Look for content type - follows pattern OP_FALSE OP_IF "ord" OP_1 "content-type"
                         elif found_ord and isinstance(data, bytes) and data == b'\x01':
                             # Next data should be content type
-                            if i + 1 < len(script_ops):
-                                _, content_type_data, _ = script_ops[i + 1]
+                            next_op = next(script_ops, None)
+                            if next_op is not None:
+                                content_type_data = next_op[1]
                                 if isinstance(content_type_data, bytes):
-                                    try:
-                                        content_type = content_type_data.decode('utf-8', errors='ignore')
-                                    except:
-                                        content_type = content_type_data.decode('ascii', errors='ignore')
-                        
+                                    content_type = content_type_data.decode('utf-8', errors='ignore')
+
                         # Look for content data - follows content-type with OP_0
                         elif found_ord and content_type and isinstance(data, bytes) and data == b'\x00':
                             # Next data should be the content
-                            if i + 1 < len(script_ops):
-                                _, content_data, _ = script_ops[i + 1]
+                            next_op = next(script_ops, None)
+                            if next_op is not None:
+                                content_data = next_op[1]
                                 # We found potential content data, let's check if it's an image
-                                if content_type and content_type.startswith('image/'):
+                                if content_type.startswith('image/'):
                                     img_type = None
                                     # Determine image type from content type
                                     if 'png' in content_type:
@@ -329,44 +1055,36 @@ def extract_images_from_witness(witness):
                                         # Trust the detected type over the content-type
                                         img_type = detected_type
                                         images.append((idx, content_data, img_type))
-                                        
+
                     except Exception as e:
-                        logger.warning(f"Error parsing script operation at index {i}: {e}")
-                    i += 1
-                
+                        logger.warning(f"Error parsing script operation: {e}")
+
                 # If we didn't find an image via metadata, attempt direct byte search for image magic numbers
                 if not content_data:
-                    # Scan the whole binary data for image magic numbers
-                    for img_type in ['png', 'jpeg', 'gif', 'bmp']:
-                        magic_signature = None
-                        if img_type == 'png':
-                            magic_signature = b'\x89PNG\r\n\x1a\n'
-                        elif img_type == 'jpeg':
-                            magic_signature = b'\xff\xd8\xff'
-                        elif img_type == 'gif':
-                            # Match either gif87a or gif89a
-                            magic_signature = b'GIF8' 
-                        elif img_type == 'bmp':
-                            magic_signature = b'BM'
-                        
-                        if magic_signature and magic_signature in bin_data:
-                            start_idx = bin_data.index(magic_signature)
-                            image_data = bin_data[start_idx:]
-                            images.append((idx, image_data, img_type))
-                            break
+                    # One regex pass finds the first magic number of any
+                    # supported format instead of scanning per format
+                    for match in _MAGIC_RE.finditer(bin_data):
+                        candidate = bin_data[match.start():]
+                        img_type = _MAGIC_TYPES[candidate[:1]]
+                        # A bare RIFF container isn't a WEBP hit
+                        if img_type == 'webp' and candidate[8:12] != b'WEBP':
+                            continue
+                        images.append((idx, candidate, img_type))
+                        break
                 
             except Exception as e:
                 logger.error(f"Failed to parse Ordinal inscription at index {idx}: {e}")
             continue
 
-        # Try legacy/segwit v0 (try multiple methods)
+        # Try legacy/segwit v0 (try multiple methods). The item was already
+        # decoded once above, so skipping the 4-hex-char prefix is just a
+        # 2-byte slice of bin_data - no second fromhex pass
         try:
             # Method 1: Traditional base64 encoded (skip first 4 chars)
-            hex_data = item[4:]
-            bin_data = bytes.fromhex(hex_data)
+            skipped = bin_data[2:]
             # Try to decode as base64
             try:
-                img_data = base64.b64decode(bin_data)
+                img_data = base64.b64decode(skipped)
                 img_type = identify_image_type(img_data)
                 if img_type:
                     images.append((idx, img_data, img_type))
@@ -375,9 +1093,9 @@ def extract_images_from_witness(witness):
                 pass
             
             # Method 2: Direct hex encoding (no base64)
-            img_type = identify_image_type(bin_data) 
+            img_type = identify_image_type(skipped)
             if img_type:
-                images.append((idx, bin_data, img_type))
+                images.append((idx, skipped, img_type))
                 continue
         except Exception:
             pass
@@ -385,27 +1103,64 @@ def extract_images_from_witness(witness):
         # Try Taproot annex (starts with '50')
         if item.startswith('50'):
             try:
-                annex_hex = item[2:]  # Skip the annex marker
-                bin_data = bytes.fromhex(annex_hex)
+                annex_data = bin_data[1:]  # Skip the annex marker byte
                 
                 # Check for image magic numbers directly
-                img_type = identify_image_type(bin_data)
+                img_type = identify_image_type(annex_data)
                 if img_type:
-                    images.append((idx, bin_data, img_type))
+                    images.append((idx, annex_data, img_type))
                     continue
                     
-                # Some annexes might have metadata prefixes, scan through the data
-                for offset in range(0, min(len(bin_data), 50)):
-                    slice_data = bin_data[offset:]
+                # Some annexes might have metadata prefixes - one regex
+                # pass over the prefix window finds the first magic number
+                # instead of re-sniffing at all 50 offsets
+                match = _MAGIC_RE.search(annex_data, 0, 50 + 8)
+                if match:
+                    slice_data = annex_data[match.start():]
                     img_type = identify_image_type(slice_data)
                     if img_type:
                         images.append((idx, slice_data, img_type))
-                        break
             except Exception as e:
                 logger.error(f"Failed to parse Taproot annex at index {idx}: {e}")
 
     return images
 
+def _op_return_pushes(script):
+    """
+    Concatenate the data pushes of a raw OP_RETURN scriptPubKey.
+
+    Walks the script bytes after the leading 0x6a opcode using the
+    standard push encodings: 0x01-0x4b push that many bytes directly,
+    0x4c/0x4d/0x4e (OP_PUSHDATA1/2/4) carry an explicit little-endian
+    length. Small-integer opcodes are skipped; anything else ends the
+    walk since OP_RETURN outputs carry nothing but pushes.
+    """
+    parts = []
+    i = 1  # skip the OP_RETURN opcode itself
+    n = len(script)
+    while i < n:
+        op = script[i]
+        i += 1
+        if 0x01 <= op <= 0x4b:
+            length = op
+        elif op == 0x4c and i + 1 <= n:
+            length = script[i]
+            i += 1
+        elif op == 0x4d and i + 2 <= n:
+            length = int.from_bytes(script[i:i + 2], 'little')
+            i += 2
+        elif op == 0x4e and i + 4 <= n:
+            length = int.from_bytes(script[i:i + 4], 'little')
+            i += 4
+        elif op == 0x00 or op == 0x4f or 0x51 <= op <= 0x60:
+            # OP_0 / OP_1NEGATE / OP_1..OP_16 carry no payload bytes
+            continue
+        else:
+            break
+        parts.append(script[i:i + length])
+        i += length
+    return b''.join(parts)
+
 def extract_images_from_op_return(tx):
     """
     Scan transaction outputs for OP_RETURN data that may contain images.
@@ -418,48 +1173,32 @@ def extract_images_from_op_return(tx):
     """
     images = []
     chunks_by_prefix = {}  # For reassembling chunked images
-    
+
     for vout in tx.get('vout', []):
-        asm = vout.get('scriptPubKey', {}).get('asm', '')
-        
-        # Check if this is an OP_RETURN output
-        if not asm.startswith('OP_RETURN'):
+        script_hex = vout.get('scriptPubKey', {}).get('hex', '')
+
+        # Check if this is an OP_RETURN output (script starts with 0x6a)
+        if not script_hex.startswith('6a'):
             continue
-            
+
         try:
-            # Extract the data after OP_RETURN
-            hex_data = asm.split('OP_RETURN ')[1]
-            
-            # Skip data that's too short
-            if len(hex_data) < 4:
-                continue
-            
-            # Clean and validate the hex data before processing
-            # Some OP_RETURN outputs might contain non-hex characters
+            # The RPC's hex field is the raw script, so the payload comes
+            # straight out of the push opcodes - no asm text splitting and
+            # no hex-character cleanup pass needed
             try:
-                # Check if hex string is valid
-                if not all(c in '0123456789abcdefABCDEF' for c in hex_data):
-                    # Clean the string - keep only hex characters
-                    clean_hex = ''.join(c for c in hex_data if c in '0123456789abcdefABCDEF')
-                    
-                    # Make sure length is even (required for bytes.fromhex)
-                    if len(clean_hex) % 2 != 0:
-                        clean_hex = clean_hex[:-1]
-                    
-                    # Skip if too short after cleaning
-                    if len(clean_hex) < 4:
-                        continue
-                    
-                    # Use cleaned hex data
-                    hex_data = clean_hex
-                    
-                # Convert hex to bytes
-                bin_data = bytes.fromhex(hex_data)
+                bin_data = _op_return_pushes(bytes.fromhex(script_hex))
             except ValueError as e:
-                logger.error(f"Failed to parse OP_RETURN data after cleaning: {e}, raw data: {hex_data[:20]}...")
-            
+                logger.error(f"Failed to parse OP_RETURN script hex: {e}, raw data: {script_hex[:20]}...")
+                continue
+
+            # Skip data that's too short
+            if len(bin_data) < 2:
+                continue
+
             # Check if this is an image chunk with a pattern like IMG_PART_<id>_<part>_<total>
-            chunk_pattern = re.search(b'IMG_PART_([0-9a-f]+)_([0-9]+)_([0-9]+)', bin_data)
+            # bytes.__contains__ settles the common no-chunk case before
+            # the regex machinery is even entered
+            chunk_pattern = _IMG_PART_RE.search(bin_data) if b'IMG_PART_' in bin_data else None
             if chunk_pattern:
                 img_id = chunk_pattern.group(1).decode('ascii')
                 part_num = int(chunk_pattern.group(2))
@@ -503,116 +1242,55 @@ def identify_image_type(data):
     """
     Identify image type based on magic numbers/signatures.
     Returns the image type as string ('png', 'jpeg', 'gif', 'bmp', 'webp') or None if not an image.
+
+    This is pure header sniffing: the one authoritative PIL decode happens
+    in display_image just before saving, so candidates rejected there are
+    never decoded twice and candidates accepted there are decoded once.
     """
-    import io
-    import imghdr
-    from PIL import Image, ImageFile, UnidentifiedImageError
-    
     if len(data) < 8:
         return None
     
-    # First check using magic numbers (faster)
+    # First check using magic numbers - one first-byte dict lookup picks
+    # the candidate signatures instead of trying every format's prefix
     magic_type = None
-    if data.startswith(b'\x89PNG\r\n\x1a\n'):
-        magic_type = 'png'
-    elif data.startswith(b'\xff\xd8\xff'):
-        magic_type = 'jpeg'
-    elif data.startswith(b'GIF89a') or data.startswith(b'GIF87a'):
-        magic_type = 'gif'
-    elif data.startswith(b'BM'):
-        magic_type = 'bmp'
-    elif data.startswith(b'RIFF') and data[8:12] == b'WEBP':
-        magic_type = 'webp'
-    
-    # Check for truncated or corrupted data
-    data_size = len(data)
-    is_truncated = False
-    validation_passed = False
-    
-    # If we found a candidate type, do more validation
+    for sig, kind in _MAGIC_SIGS.get(data[0], ()):
+        if data.startswith(sig):
+            if kind == 'webp' and data[8:12] != b'WEBP':
+                continue
+            magic_type = kind
+            break
+
     if magic_type:
-        # Basic size sanity checks by format
+        # Basic size sanity checks by format - log suspiciously small
+        # payloads but still report the type; the real decode decides
+        data_size = len(data)
         if (magic_type == 'png' and data_size < 50) or \
            (magic_type == 'jpeg' and data_size < 100) or \
            (magic_type == 'gif' and data_size < 40) or \
            (magic_type == 'bmp' and data_size < 54):
-            is_truncated = True
             logger.warning(f"{magic_type.upper()} data appears truncated: {data_size} bytes is too small")
-        
-        try:
-            # Use imghdr for additional verification
-            img_type_check = imghdr.what(None, data)
-            
-            # If imghdr returns a type and it's different, log it
-            if img_type_check and img_type_check != magic_type and img_type_check != 'jpeg' and magic_type != 'jpg':
-                logger.warning(f"Image type mismatch: magic={magic_type}, imghdr={img_type_check}. Using {img_type_check}.")
-                magic_type = img_type_check
-            
-            # Check for format-specific corruption indicators
-            if magic_type == 'jpeg':
-                # Check for proper JPEG structure - should have SOI, APP0, DQT, SOF markers
-                # But adding this creates false positives - will rely on PIL validation
-                pass
-                
-            # Try loading with PIL as final validation (handles corrupted files better)
-            try:
-                img_data = io.BytesIO(data)
-                p = ImageFile.Parser()
-                
-                # Feed the parser in chunks to better detect truncation
-                chunk_size = 1024
-                while True:
-                    chunk = img_data.read(chunk_size)
-                    if not chunk:
-                        break
-                    p.feed(chunk)
-                
-                if p.image:
-                    # Additional test - verify with PIL's open
-                    try:
-                        with Image.open(io.BytesIO(data)) as img:
-                            # Try to decode the image
-                            img.load()
-                            validation_passed = True
-                            return magic_type
-                    except Exception as e:
-                        logger.warning(f"PIL image load failed: {e}")
-            except Exception as e:
-                # Image didn't pass PIL validation but still has correct magic bytes
-                logger.warning(f"Image failed PIL validation: {e}. Still saving based on magic bytes.")
-                return magic_type
-        except Exception as e:
-            logger.warning(f"Image validation error: {e}")
-            # Fall back to magic number detection if validation fails
-            return magic_type
+        return magic_type
     
-    # Try imghdr for types not caught by magic numbers
-    try:
-        img_type = imghdr.what(None, data)
-        if img_type:
-            return img_type
-    except:
-        pass
-    
-    return magic_type
+    return None
 
-def display_image(img_data, img_type, txid=None, vin_idx=None, wit_idx=None, block_height=None, tx=None, is_mempool=False, source_type=None, skip_display=False):
-    import json
-    from datetime import datetime
-    import hashlib
-    import io
-    from PIL import Image, UnidentifiedImageError
+def display_image(img_data, img_type, txid=None, vin_idx=None, wit_idx=None, block_height=None, tx=None, is_mempool=False, source_type=None, skip_display=False, validated=False):
+    # Strict validation: Only save images that can be fully loaded by
+    # Pillow. Skipped when the caller already decoded this exact buffer,
+    # except for corrupted-output candidates which always get re-checked
+    if not validated or source_type == "corrupted_output":
+        try:
+            with Image.open(io.BytesIO(img_data)) as img:
+                img.load()
+        except Exception as e:
+            logger.info(f"[SKIP] Not a valid image: {e}")
+            return
 
-    # Strict validation: Only save images that can be fully loaded by Pillow
-    try:
-        with Image.open(io.BytesIO(img_data)) as img:
-            img.load()
-    except Exception as e:
-        logger.info(f"[SKIP] Not a valid image: {e}")
-        return
+    # One fused hash pass over the bytes: the sha256 digest is needed for
+    # the index entry anyway, so its prefixes double as the filename
+    # uniqueness tags that previously cost a second blake2b walk
+    img_digest = hashlib.sha256(img_data).digest()
 
     # Passed validation, save image
-    os.makedirs("images", exist_ok=True)
     if txid is not None:
         if vin_idx is not None and wit_idx is not None:
             filename = f"images/{txid}_{vin_idx}_{wit_idx}.{img_type}"
@@ -621,12 +1299,12 @@ def display_image(img_data, img_type, txid=None, vin_idx=None, wit_idx=None, blo
             filename = f"images/{txid}_in{vin_idx}.{img_type}"
             file_id = f"in{vin_idx}"
         else:
-            img_hash = hashlib.md5(img_data).hexdigest()[:8]
+            img_hash = img_digest[:4].hex()
             source_prefix = source_type or "img"
             filename = f"images/{txid}_{source_prefix}_{img_hash}.{img_type}"
             file_id = f"{source_prefix}_{img_hash}"
     else:
-        img_hash = hashlib.md5(img_data).hexdigest()[:16]
+        img_hash = img_digest[:8].hex()
         filename = f"images/unknown_{img_hash}.{img_type}"
         file_id = f"unknown_{img_hash}"
         txid = f"unknown_{img_hash[:8]}"
@@ -639,17 +1317,8 @@ def display_image(img_data, img_type, txid=None, vin_idx=None, wit_idx=None, blo
         logger.error(f"Could not save image file {filename}: {e}")
         return
 
-    # Save metadata to JSON index
-    index_file = "images/index.json"
+    # Save metadata to the index
     try:
-        if os.path.isfile(index_file):
-            with open(index_file, "r") as jf:
-                try:
-                    index = json.load(jf)
-                except Exception:
-                    index = {}
-        else:
-            index = {}
         if not source_type:
             if wit_idx is not None:
                 if tx:
@@ -672,7 +1341,9 @@ def display_image(img_data, img_type, txid=None, vin_idx=None, wit_idx=None, blo
             entry["wit_idx"] = wit_idx
         if block_height is not None:
             entry["block_height"] = block_height
-        entry["image_hash"] = hashlib.sha256(img_data).hexdigest()
+        # Hex of the digest computed above; doubles as the dedup key in
+        # _apply_index_entry and the JSON value
+        entry["image_hash"] = img_digest.hex()
         if tx:
             entry["inscription_type"] = identify_inscription_type(tx, wit_idx) if wit_idx is not None else source_type
             tx_details = {
@@ -691,43 +1362,15 @@ def display_image(img_data, img_type, txid=None, vin_idx=None, wit_idx=None, blo
                 "num_outputs": len(tx.get("vout", []))
             }
             entry["tx_details"] = tx_details
-        should_add = True
-        if txid in index:
-            for existing_entry in index[txid]:
-                if ((file_id and 
-                     (existing_entry.get("vin_idx") == vin_idx and existing_entry.get("wit_idx") == wit_idx)) or
-                    (entry.get("image_hash") and existing_entry.get("image_hash") == entry["image_hash"])):
-                    if block_height and not existing_entry.get("block_height"):
-                        existing_entry.update({
-                            "block_height": block_height,
-                            "source": "block",
-                            "timestamp": entry["timestamp"]
-                        })
-                        logger.info(f"Updated existing entry with block information: {block_height}")
-                    should_add = False
-                    break
-        else:
-            index[txid] = []
-        if should_add:
-            index[txid].append(entry)
+        if update_index(txid, entry):
             logger.info(f"Added new entry for txid: {txid}")
-        with open(index_file, "w") as jf:
-            def json_serializer(obj):
-                from decimal import Decimal
-                if isinstance(obj, Decimal):
-                    return float(obj)
-                return str(obj)
-            json.dump(index, jf, indent=2, default=json_serializer)
-        logger.info(f"JSON index updated at {index_file}")
     except Exception as e:
-        logger.error(f"Could not update {index_file}: {e}")
+        logger.error(f"Could not update index: {e}")
     if skip_display:
         logger.info("Skipping image display (disabled)")
         return
-    # Display image in terminal
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{img_type}') as f:
-        f.write(img_data)
-        img_path = f.name
+    # Display image in terminal (handed to the background worker so the
+    # scanner isn't blocked on the renderer)
     display_info = f"Displaying image from txid={txid}"
     if vin_idx is not None:
         display_info += f", vin={vin_idx}"
@@ -735,13 +1378,59 @@ def display_image(img_data, img_type, txid=None, vin_idx=None, wit_idx=None, blo
         display_info += f", witness={wit_idx}"
     if source_type:
         display_info += f", type={source_type}"
+    _queue_display(img_data, img_type, display_info)
+
+# The terminal renderer is far slower than parsing, so a single daemon
+# worker owns viu and display latency overlaps the next tx. The queue is
+# one deep and drops the oldest pending image when the viewer can't keep
+# up - it's a live preview, not an archive (every image is saved anyway)
+_display_queue = queue.Queue(maxsize=1)
+_display_thread = None
+_display_thread_lock = threading.Lock()
+
+def _show_image(img_data, img_type, display_info):
+    """Render one image with viu. Runs only on the display worker."""
     logger.info(display_info)
     try:
-        subprocess.run(["viu", img_path], check=False)
+        # viu reads from stdin with "-", so the bytes go straight down
+        # the pipe - no tempfile write, unlink, or page-cache churn
+        subprocess.run(["viu", "-"], input=img_data, check=False)
     except Exception as e:
         logger.error(f"Failed to display image with viu: {e}")
-    finally:
-        os.remove(img_path)
+
+def _display_worker():
+    while True:
+        _show_image(*_display_queue.get())
+        _display_queue.task_done()
+
+def _drain_display_at_exit() -> None:
+    """
+    Wait for the worker to finish rendering whatever is still queued.
+    Without this a short-lived caller (lookup_image.py) enqueues, returns
+    and exits before the daemon thread ever runs viu.
+    """
+    if _display_thread is not None and _display_thread.is_alive():
+        _display_queue.join()
+
+atexit.register(_drain_display_at_exit)
+
+def _queue_display(img_data, img_type, display_info):
+    """Hand an image to the display worker, dropping the oldest if full"""
+    global _display_thread
+    if _display_thread is None:
+        with _display_thread_lock:
+            if _display_thread is None:
+                _display_thread = threading.Thread(target=_display_worker, daemon=True)
+                _display_thread.start()
+    while True:
+        try:
+            _display_queue.put_nowait((img_data, img_type, display_info))
+            return
+        except queue.Full:
+            try:
+                _display_queue.get_nowait()
+            except queue.Empty:
+                pass
 
 def identify_inscription_type(tx, wit_idx):
     """
@@ -753,36 +1442,45 @@ def identify_inscription_type(tx, wit_idx):
     # Check if it's a taproot transaction
     is_taproot = False
     has_annex = False
-    has_ord_marker = False
-    
+
     try:
-        # Check witness for taproot indicators
+        # Check witness for taproot indicators. One pass per vin: prefix
+        # tests are two-char slices, and the hex of every scannable item
+        # is joined so the ord-marker check costs a single decode plus
+        # one C-level find instead of one bytes.fromhex per item. Items
+        # are joined with a 0xff sentinel run - 0xff never appears in the
+        # marker, so the find can't fabricate a match across item
+        # boundaries. The result is a strict priority (ordinal > annex >
+        # taproot), so the first ord marker decides the answer and ends
+        # the scan
         for vin in tx.get('vin', []):
             witness = vin.get('txinwitness', [])
-            if witness and len(witness) > 0:
-                # Check for taproot witness (control block)
-                if any(item.startswith('20') or item.startswith('21') for item in witness):
+            if not witness:
+                continue
+            hex_parts = []
+            for item in witness:
+                if not isinstance(item, str):
+                    continue
+                prefix = item[:2]
+                # Taproot witness (control block) vs annex
+                if prefix == '20' or prefix == '21':
                     is_taproot = True
-                # Check for annex
-                if any(item.startswith('50') for item in witness):
+                elif prefix == '50':
                     has_annex = True
-                # Check for ord marker
-                for item in witness:
-                    if isinstance(item, str) and len(item) > 12:
-                        try:
-                            bin_data = bytes.fromhex(item)
-                            if b'\x00c\x03ord' in bin_data:
-                                has_ord_marker = True
-                                break
-                        except:
-                            pass
+                # Length and charset are validated up front so the decode
+                # below can't raise - a C-level regex match is far cheaper
+                # than building and unwinding a ValueError per bad item
+                if len(item) > 12 and len(item) % 2 == 0 and _HEX_RE.match(item):
+                    hex_parts.append(item)
+            if hex_parts:
+                buf = bytes.fromhex(('ff' * 6).join(hex_parts))
+                if buf.find(b'\x00c\x03ord') != -1:
+                    return "ordinal"
     except Exception as e:
         logger.error(f"Failed to identify inscription type: {e}")
-    
-    # Determine the type based on findings
-    if has_ord_marker:
-        return "ordinal"
-    elif has_annex:
+
+    # No ord marker anywhere - fall back to the prefix flags
+    if has_annex:
         return "taproot_annex"
     elif is_taproot:
         return "taproot"
@@ -797,32 +1495,33 @@ def extract_images_from_corrupted_outputs(tx):
     Returns a list of (img_data, img_type) tuples.
     """
     images = []
-    
+
     for vout in tx.get('vout', []):
-        script_type = vout.get('scriptPubKey', {}).get('type', '')
-        
-        # Skip standard script types
-        if script_type in ['pubkeyhash', 'scripthash', 'witness_v0_keyhash', 
-                          'witness_v0_scripthash', 'witness_v1_taproot', 'multisig', 
-                          'nulldata', 'nonstandard']:
-            # We still check nonstandard scripts
-            if script_type != 'nonstandard':
-                continue
-        
+        spk = vout.get('scriptPubKey') or _EMPTY
+
+        # Skip standard script types; nonstandard is deliberately absent
+        # from the set so those scripts still get checked
+        if spk.get('type', '') in _STANDARD_SCRIPT_TYPES:
+            continue
+
         # Get the script as hex
-        hex_script = vout.get('scriptPubKey', {}).get('hex', '')
+        hex_script = spk.get('hex', '')
         if not hex_script:
             continue
             
         try:
-            # Convert hex to bytes
+            # Convert hex to bytes once, then sweep for every magic
+            # number with the compiled alternation - images hidden behind
+            # push opcodes are found mid-script instead of only when the
+            # signature happens to sit at byte 0
             bin_data = bytes.fromhex(hex_script)
-            
-            # Check for image signatures
-            img_type = identify_image_type(bin_data)
-            if img_type:
-                images.append((bin_data, img_type))
-                
+            match = _MAGIC_RE.search(bin_data)
+            if match:
+                candidate = bin_data[match.start():]
+                img_type = identify_image_type(candidate)
+                if img_type:
+                    images.append((candidate, img_type))
+
         except Exception as e:
             logger.error(f"Failed to parse script data: {e}")
     
@@ -851,35 +1550,24 @@ def retrieve_from_ipfs(cid):
     logger.info(f"IPFS extraction disabled - not retrieving CID: {cid}")
     return None, None
 
-def validate_image(img_data, img_type):
+def validate_image(img_data, img_type, deep=False):
     """
     Perform a comprehensive validation of image data to detect corrupt images.
+    The default pass uses Image.verify() - structure and checksum walking
+    without decoding pixels; deep=True additionally decodes the full image.
     Returns a tuple of (is_valid, message, image_info)
     """
-    import io
-    from PIL import Image, UnidentifiedImageError, ImageFile
-    import imghdr
-
     # Early rejection for really small data
     if len(img_data) < 50:
         return False, "Image data too small", {}
 
-    # Validate file signatures
-    if img_type == 'png' and not img_data.startswith(b'\x89PNG\r\n\x1a\n'):
-        return False, "Invalid PNG signature", {}
-    elif img_type == 'jpeg' and not img_data.startswith(b'\xff\xd8\xff'):
-        return False, "Invalid JPEG signature", {}
-    elif img_type == 'gif' and not (img_data.startswith(b'GIF87a') or img_data.startswith(b'GIF89a')):
-        return False, "Invalid GIF signature", {}
-    elif img_type == 'bmp' and not img_data.startswith(b'BM'):
-        return False, "Invalid BMP signature", {}
-    elif img_type == 'webp' and not (img_data.startswith(b'RIFF') and img_data[8:12] == b'WEBP'):
-        return False, "Invalid WEBP signature", {}
-    
-    # Double-check format with imghdr
-    detected_format = imghdr.what(None, img_data)
-    if detected_format and detected_format != img_type and detected_format != 'jpeg' and img_type != 'jpg':
-        logger.warning(f"Format mismatch: magic says {img_type}, imghdr says {detected_format}")
+    # Validate file signatures via the module-level table - one
+    # tuple-aware startswith instead of a per-format branch ladder
+    sig = _SIGS.get(img_type)
+    if sig is not None:
+        sig_ok = sig(img_data) if callable(sig) else img_data.startswith(sig)
+        if not sig_ok:
+            return False, f"Invalid {img_type.upper()} signature", {}
     
     # Use deep validation for JPEG files to catch Huffman code errors
     if img_type in ('jpeg', 'jpg'):
@@ -890,25 +1578,25 @@ def validate_image(img_data, img_type):
             if not p.image:
                 return False, "Invalid JPEG structure (parser couldn't build image)", {}
                 
-            # Look for common JPEG corruption markers
-            if b'xff47' in img_data.lower() or b'xfff0' in img_data.lower():
+            # Look for common JPEG corruption markers in one compiled
+            # alternation pass instead of two separate substring walks
+            if _JPEG_SUSPECT_RE.search(img_data):
                 return False, "Suspicious JPEG markers detected", {}
-            
+
             # Additional check for corrupted JPEGs - many Bad Huffman Code errors
-            # occur with specific byte patterns
-            if any(pattern in img_data for pattern in [b'\xff\x00\xff', b'\xff\xc0\x00', b'\xef\xbf\xbd']):
+            # occur with specific byte patterns; one compiled alternation
+            # scans for all three in a single pass
+            if _JPEG_BAD_RE.search(img_data):
                 return False, "Corrupted JPEG data detected", {}
         except Exception as e:
             return False, f"JPEG validation error: {str(e)}", {}
     
-    # Try to parse the image with PIL
+    # Parse the headers with PIL and verify structure without decoding
+    # pixels - for PNG that walks the chunk CRCs, for JPEG the marker
+    # stream, at a fraction of the cost of a full decode
     try:
-        data_stream = io.BytesIO(img_data)
-        with Image.open(data_stream) as img:
-            # Force PIL to process the entire image
-            img.load()
-            
-            # Get image dimensions and more info
+        with Image.open(_shared_bio(img_data)) as img:
+            # Get image dimensions and more info (header-only, no decode)
             image_info = {
                 "width": img.width,
                 "height": img.height,
@@ -916,38 +1604,36 @@ def validate_image(img_data, img_type):
                 "mode": img.mode,
                 "size_bytes": len(img_data)
             }
-            
+
             # Sanity check for image dimensions - reject unreasonable sizes
             # Images can't be zero-sized
             if img.width <= 0 or img.height <= 0:
                 return False, f"Invalid image dimensions: {img.width}x{img.height}", image_info
-                
+
             # Images shouldn't be unreasonably large (over 100,000 pixels in either dimension)
             if img.width > 100000 or img.height > 100000:
                 return False, f"Suspicious image dimensions: {img.width}x{img.height}", image_info
-                
+
             # Validate size in bytes vs dimensions (very rough check)
             # For PNG/JPEG, we expect compression, but there should be some minimal size
             expected_min_bytes = (img.width * img.height) / 100  # Very rough estimate
             if len(img_data) < expected_min_bytes and len(img_data) < 10:
                 return False, f"Image data too small for dimensions", image_info
-            
-            # Do deep validation - try to transcode the image to verify data integrity
-            # This will catch many issues that just loading the image won't
-            try:
-                output = io.BytesIO()
-                img.save(output, format=img.format)
-                
-                # For JPEGs and BMPs, also verify by attempting to convert to PNG
-                if img_type in ('jpeg', 'jpg', 'bmp'):
-                    test_output = io.BytesIO()
-                    img.save(test_output, format='PNG')
-            except Exception as e:
-                return False, f"Image transcode validation failed: {str(e)}", image_info
-                
-            return True, "", image_info
-            
+
+            img.verify()
+
     except UnidentifiedImageError:
         return False, "Image data could not be identified as a valid image", {}
     except Exception as e:
-        return False, f"Image validation error: {str(e)}", {}
\ No newline at end of file
+        return False, f"Image validation error: {str(e)}", {}
+
+    # Deep validation decodes every pixel; verify() leaves the image
+    # object unusable, so the caller-requested decode reopens the buffer
+    if deep:
+        try:
+            with Image.open(_shared_bio(img_data)) as img:
+                img.load()
+        except Exception as e:
+            return False, f"Image decode failed: {str(e)}", image_info
+
+    return True, "", image_info
\ No newline at end of file